@@ -0,0 +1,99 @@
+"""Startup benchmark: time until the DiaDrop start menu is shown
+
+Starts the app in fresh interpreters and reports the median time from process start
+until the StartMenu window has been drawn, followed by the slowest top-level imports
+(as measured by python -X importtime).
+
+    python benchmarks/startup.py [--app de] [--runs 5] [--top 15] [--budget 1500]
+
+Without a display, --imports-only measures the time until the script is imported.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src")
+APPS = {"en": "v3.1.py", "de": "v3.1_g.py"}
+
+# Runs inside the measured interpreter and prints a marker after each phase
+CHILD = """
+import importlib.util, sys
+sys.path.insert(0, {src_dir!r})
+spec = importlib.util.spec_from_file_location("diadrop_app", {app_path!r})
+app = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(app)
+print("imported", flush=True)
+if not {imports_only!r}:
+    window = app.StartMenu()
+    window.update()
+    print("shown", flush=True)
+    window.destroy()
+"""
+
+def run_once(app_path, env, imports_only, importtime=False):
+    """Returns the seconds from process start to each marker and the stderr output"""
+    code = CHILD.format(src_dir=SRC_DIR, app_path=app_path, imports_only=imports_only)
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    start = time.perf_counter()
+    process = subprocess.Popen(command, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               text=True)
+    markers = {}
+    for line in process.stdout:
+        markers[line.strip()] = time.perf_counter() - start
+    stderr = process.stderr.read()
+    if process.wait() != 0:
+        raise RuntimeError(f"The app could not be started:\n{stderr.strip()}")
+    return markers, stderr
+
+def slowest_imports(stderr, top):
+    """Returns (cumulative seconds, module) of the slowest top-level imports"""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Nested imports are indented, their time is part of the top-level import
+        if name.startswith("  ") or not cumulative.strip().isdigit():
+            continue
+        imports.append((int(cumulative) / 1e6, name.strip()))
+    imports.sort(reverse=True)
+    return imports[:top]
+
+def main(args):
+    parser = argparse.ArgumentParser(description="Measures the time until the start menu is shown.")
+    parser.add_argument("--app", choices=sorted(APPS), default="en", help="app to start (default: en)")
+    parser.add_argument("--runs", type=int, default=5, help="number of measured starts (default: 5)")
+    parser.add_argument("--top", type=int, default=15, help="number of imports to list (default: 15)")
+    parser.add_argument("--imports-only", action="store_true", help="stop after importing the script")
+    parser.add_argument("--budget", type=float, help="fail if the median exceeds this many milliseconds")
+    parser.add_argument("--appdata", help="data directory of the app (default: a temporary directory)")
+    options = parser.parse_args(args)
+
+    app_path = os.path.abspath(os.path.join(SRC_DIR, APPS[options.app]))
+    marker = "imported" if options.imports_only else "shown"
+    with tempfile.TemporaryDirectory() as temp_dir:
+        env = dict(os.environ, APPDATA=options.appdata or temp_dir)
+        # The first start derives and caches the key, like the first start after installing
+        run_once(app_path, env, options.imports_only)
+        times = [run_once(app_path, env, options.imports_only)[0][marker] for _ in range(options.runs)]
+        _, stderr = run_once(app_path, env, options.imports_only, importtime=True)
+
+    median = statistics.median(times)
+    label = "script imported" if options.imports_only else "start menu shown"
+    print(f"Time until {label}: median {median * 1000:.0f} ms, "
+          f"min {min(times) * 1000:.0f} ms, max {max(times) * 1000:.0f} ms ({options.runs} runs)")
+    print("\nSlowest imports (cumulative):")
+    for seconds, name in slowest_imports(stderr, options.top):
+        print(f"  {seconds * 1000:8.1f} ms  {name}")
+
+    if options.budget is not None and median * 1000 > options.budget:
+        print(f"\nMedian exceeds the budget of {options.budget:.0f} ms")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
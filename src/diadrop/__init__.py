@@ -0,0 +1,66 @@
+"""GUI-free core of DiaDrop: project model, .dia format, encryption and chart rendering.
+
+Importing this package loads neither Tk nor pandas, so scripts, servers and benchmarks
+can work with projects without the desktop app.
+"""
+import importlib
+
+# Module of each public name; modules are imported on first use, so reading the project
+# index does not load numpy or matplotlib
+_EXPORTS = {
+    "DiaParseError": "dia_format",
+    "parse_dia_rows": "dia_format",
+    "set_language": "texts",
+    "tr": "texts",
+    "COLOR_SCHEMES": "model",
+    "scheme_colors": "model",
+    "DataTable": "model",
+    "DiagramProject": "model",
+    "get_app_data_dir": "files",
+    "atomic_write": "files",
+    "KeyProvider": "crypto",
+    "EncryptionManager": "crypto",
+    "SegmentReader": "crypto",
+    "write_project_file": "projects",
+    "read_project_file": "projects",
+    "ProjectJournal": "projects",
+    "ProjectEntry": "projects",
+    "ProjectIndex": "projects",
+    "ProjectImport": "projects",
+    "find_project_files": "projects",
+    "ChartRenderer": "renderer",
+    "BarRenderer": "renderer",
+    "LineRenderer": "renderer",
+    "ScatterRenderer": "renderer",
+    "PieRenderer": "renderer",
+    "CHART_RENDERERS": "renderer",
+    "create_renderer": "renderer",
+    "export_figure": "renderer",
+    "FrameCache": "renderer",
+    "AGGREGATIONS": "aggregation",
+    "aggregate_table": "aggregation",
+    "ThumbnailCache": "thumbnails",
+    "thumbnail_name": "thumbnails",
+    "render_thumbnail": "thumbnails",
+    "EXPORT_FORMATS": "export",
+    "export_targets": "export",
+    "ChartExport": "export",
+    "TABLE_EXTENSIONS": "importers",
+    "TableImportError": "importers",
+    "JobCancelled": "jobs",
+    "TableReader": "importers",
+    "read_table": "importers"
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
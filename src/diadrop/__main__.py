@@ -0,0 +1,10 @@
+"""Command line entry: python -m diadrop render <paths>"""
+import sys
+
+from .cli import render_main
+from .texts import tr
+
+if __name__ == "__main__":
+    if sys.argv[1:2] != ["render"]:
+        sys.exit(tr("usage: python -m diadrop render [-h] paths [paths ...]"))
+    sys.exit(render_main(sys.argv[2:]))
@@ -0,0 +1,69 @@
+"""Aggregation of large tables into fewer categories for bar and pie charts"""
+import numpy as np
+import math
+
+from .model import DataTable
+from .texts import tr
+
+# "top" keeps the largest categories and sums up the rest, "group" sums up rows with the
+# same label, "bins" counts the values per value range and "off" draws every row
+AGGREGATIONS = ("top", "group", "bins", "off")
+MAX_CATEGORIES = 25
+OTHER_LABEL = "Other"
+OTHER_COLOR = "#808080"
+
+def group_labels(table):
+    """Sums up the values of rows with the same label, in the order of their first row"""
+    if len(table) < 2:
+        return table
+    labels, first, inverse = np.unique(np.array(table.labels), return_index=True, return_inverse=True)
+    if len(labels) == len(table):
+        return table
+    sums = np.bincount(inverse, weights=table.values, minlength=len(labels))
+    order = np.argsort(first)
+    return DataTable.from_columns(labels[order].tolist(), sums[order], table.color_codes[first[order]],
+                                  table.palette)
+
+def top_categories(table, count):
+    """Keeps the count - 1 largest categories in their order and sums up the others as OTHER_LABEL
+    
+    Tables with too many rows are grouped by label first.
+    """
+    if len(table) <= count:
+        return table
+    table = group_labels(table)
+    if len(table) <= count:
+        return table
+    values = table.values
+    keep = np.sort(np.argpartition(-values, count - 2)[:count - 1])
+    rest = np.ones(len(table), dtype=bool)
+    rest[keep] = False
+    
+    labels = [table.labels[i] for i in keep.tolist()] + [tr(OTHER_LABEL)]
+    palette = table.palette + [OTHER_COLOR]
+    color_codes = np.append(table.color_codes[keep], len(palette) - 1)
+    return DataTable.from_columns(labels, np.append(values[keep], values[rest].sum()), color_codes, palette)
+
+def bin_values(table, count):
+    """Counts the rows per value range, count ranges of equal width"""
+    if not len(table):
+        return table
+    counts, edges = np.histogram(table.values, bins=count)
+    # Enough decimals to tell neighbouring ranges apart
+    width = edges[1] - edges[0]
+    digits = max(0, 1 - math.floor(math.log10(width))) if width > 0 else 0
+    edges = edges.tolist()
+    labels = [f"{low:.{digits}f} – {high:.{digits}f}" for low, high in zip(edges, edges[1:])]
+    # The colors of the first rows repeat over the ranges
+    color_codes = table.color_codes[np.arange(count) % len(table)]
+    return DataTable.from_columns(labels, counts, color_codes, table.palette)
+
+def aggregate_table(table, mode, count=MAX_CATEGORIES):
+    """Returns the table drawn for an aggregation mode, the table itself if nothing changes"""
+    if mode == "top":
+        return top_categories(table, count)
+    if mode == "group":
+        return group_labels(table)
+    if mode == "bins":
+        return bin_values(table, count)
+    return table
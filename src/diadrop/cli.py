@@ -0,0 +1,77 @@
+"""Command line rendering of project files"""
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .crypto import EncryptionManager
+from .projects import read_project_file, find_project_files
+from .renderer import create_renderer, export_figure
+from .aggregation import AGGREGATIONS
+from .texts import tr
+
+def render_project_file(file_path, output_dir, formats, dpi=300, aggregation="top"):
+    """Renders one project file to images, returns the written paths"""
+    encryption = EncryptionManager()
+    project = read_project_file(file_path, encryption)
+    if project is None:
+        raise ValueError(tr("The file could not be decrypted"))
+    if not project.data:
+        raise ValueError(tr("The project has no data"))
+    
+    figure = Figure(figsize=(project.width, project.height), facecolor='#2B2B2B')
+    FigureCanvasAgg(figure)
+    # Files get every point, not the subset drawn on screen
+    create_renderer(figure, project.chart_type, full_resolution=True, aggregation=aggregation).render(project)
+    
+    base_name = os.path.splitext(os.path.basename(file_path))[0]
+    paths = []
+    for file_format in formats:
+        image_path = os.path.join(output_dir or os.path.dirname(file_path), f"{base_name}.{file_format}")
+        export_figure(figure, image_path, dpi)
+        paths.append(image_path)
+    return paths
+
+def render_main(args):
+    """Command line entry for rendering charts without a window"""
+    parser = argparse.ArgumentParser(
+        prog="diadrop render",
+        description=tr("Renders .dia projects to images without opening a window.")
+    )
+    parser.add_argument("paths", nargs="+", help=tr(".dia files or directories containing them"))
+    parser.add_argument("-o", "--output", help=tr("output directory (default: next to each project)"))
+    parser.add_argument("-f", "--formats", default="png", 
+                        help=tr("comma separated image formats: png, svg, pdf (default: png)"))
+    parser.add_argument("--dpi", type=int, default=300, help=tr("resolution of raster images (default: 300)"))
+    parser.add_argument("--aggregate", choices=AGGREGATIONS, default="top",
+                        help=tr("how bar and pie charts show large tables (default: top)"))
+    parser.add_argument("-j", "--jobs", type=int, default=None, help=tr("number of worker processes"))
+    options = parser.parse_args(args)
+    
+    formats = [name.strip().lower() for name in options.formats.split(",") if name.strip()]
+    unsupported = [name for name in formats if name not in ("png", "svg", "pdf")]
+    if unsupported or not formats:
+        parser.error(tr("unsupported format: {formats}").format(formats=', '.join(unsupported) or options.formats))
+    if options.output:
+        os.makedirs(options.output, exist_ok=True)
+    
+    files = find_project_files(options.paths)
+    failed = 0
+    with ProcessPoolExecutor(max_workers=options.jobs) as executor:
+        futures = {
+            executor.submit(render_project_file, file_path, options.output, formats, options.dpi,
+                            options.aggregate): file_path
+            for file_path in files
+        }
+        for future in as_completed(futures):
+            file_path = futures[future]
+            try:
+                for image_path in future.result():
+                    print(tr("Rendered {file} -> {image}").format(file=file_path, image=image_path))
+            except Exception as e:
+                failed += 1
+                print(tr("Error rendering {file}: {error}").format(file=file_path, error=e))
+    
+    print(tr("{rendered} of {total} projects rendered").format(rendered=len(files) - failed, total=len(files)))
+    return 1 if failed else 0
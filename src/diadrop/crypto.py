@@ -0,0 +1,291 @@
+"""Encryption of project files"""
+import os
+import base64
+from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+import hashlib
+import hmac
+import threading
+import json
+import io
+import codecs
+
+from .files import get_app_data_dir, atomic_write
+from .texts import tr
+
+class KeyProvider:
+    """Derives the project key once per process and caches it on disk"""
+    PASSWORD = b"dia_drop_secret_key_2024"
+    SALT = b"dia_drop_salt_2024"
+    ITERATIONS = 100000
+    
+    _lock = threading.Lock()
+    _keys = {}
+    _fernets = {}
+    
+    @classmethod
+    def get_key(cls, password=PASSWORD, salt=SALT, iterations=ITERATIONS):
+        cache_id = cls._cache_id(password, salt, iterations)
+        with cls._lock:
+            key = cls._keys.get(cache_id)
+            if key is None:
+                key = cls._read_cached_key(cache_id)
+                if key is None:
+                    key = cls._derive_key(password, salt, iterations)
+                    cls._write_cached_key(cache_id, key)
+                cls._keys[cache_id] = key
+            return key
+    
+    @classmethod
+    def get_fernet(cls, password=PASSWORD, salt=SALT, iterations=ITERATIONS):
+        key = cls.get_key(password, salt, iterations)
+        with cls._lock:
+            fernet = cls._fernets.get(key)
+            if fernet is None:
+                fernet = Fernet(key)
+                cls._fernets[key] = fernet
+            return fernet
+    
+    @staticmethod
+    def _cache_id(password, salt, iterations):
+        material = b"\0".join([b"pbkdf2-sha256", password, salt, str(iterations).encode()])
+        return hashlib.sha256(material).hexdigest()
+    
+    @staticmethod
+    def _derive_key(password, salt, iterations):
+        # Only needed when the key is not cached yet
+        from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+        kdf = PBKDF2HMAC(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=salt,
+            iterations=iterations,
+        )
+        return base64.urlsafe_b64encode(kdf.derive(password))
+    
+    @staticmethod
+    def _cache_path(cache_id):
+        return os.path.join(get_app_data_dir(), 'cache', 'keys', f"{cache_id}.key")
+    
+    @classmethod
+    def _read_cached_key(cls, cache_id):
+        try:
+            with open(cls._cache_path(cache_id), 'rb') as f:
+                key, check = f.read().split(b"\n")[:2]
+            # Reject corrupted or foreign cache entries
+            expected = hmac.new(base64.urlsafe_b64decode(key), cache_id.encode(), hashlib.sha256).hexdigest()
+            if hmac.compare_digest(check, expected.encode()):
+                return key
+        except Exception:
+            pass
+        return None
+    
+    @classmethod
+    def _write_cached_key(cls, cache_id, key):
+        file_path = cls._cache_path(cache_id)
+        try:
+            os.makedirs(os.path.dirname(file_path), mode=0o700, exist_ok=True)
+            check = hmac.new(base64.urlsafe_b64decode(key), cache_id.encode(), hashlib.sha256).hexdigest()
+            # Only the current user may read the cached key
+            atomic_write(file_path, key + b"\n" + check.encode(), mode=0o600)
+        except Exception as e:
+            print(tr("Could not cache key: {error}").format(error=e))
+
+class EncryptionManager:
+    # Project files: magic, version and nonce prefix, followed by length prefixed AES-GCM
+    # segments. The first segment holds the project summary, the others the .dia text
+    # (version 1) or the binary .dia format (version 2, which also stores the segment size).
+    MAGIC = b"DIAC"
+    VERSION = 2
+    SEGMENT_SIZE = 64 * 1024
+    
+    def __init__(self):
+        self.key = KeyProvider.get_key()
+        self.fernet = KeyProvider.get_fernet()
+        # Separate key for the segments, the Fernet key is only used for Fernet
+        segment_key = HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=None,
+            info=b"DiaDrop segments v1",
+        ).derive(base64.urlsafe_b64decode(self.key))
+        self.aead = AESGCM(segment_key)
+    
+    def encrypt_data(self, data):
+        encrypted_data = self.fernet.encrypt(data.encode())
+        return encrypted_data
+    
+    @staticmethod
+    def _nonce(prefix, index, last):
+        # The index prevents reordering, the last flag prevents truncation
+        return prefix + index.to_bytes(4, "big") + (b"\x01" if last else b"\x00")
+    
+    def encrypt_to(self, chunks, f, summary=None):
+        """Encrypts text chunks segment by segment into f"""
+        prefix = os.urandom(7)
+        header = self.MAGIC + bytes([self.VERSION]) + prefix + self.SEGMENT_SIZE.to_bytes(4, "big")
+        f.write(header)
+        index = 0
+        
+        def write_segment(data, last=False):
+            nonlocal index
+            ciphertext = self.aead.encrypt(self._nonce(prefix, index, last), bytes(data), header)
+            f.write(len(ciphertext).to_bytes(4, "big"))
+            f.write(ciphertext)
+            index += 1
+        
+        write_segment(json.dumps(summary or {}).encode())
+        buffer = bytearray()
+        for chunk in chunks:
+            buffer += chunk.encode() if isinstance(chunk, str) else chunk
+            while len(buffer) > self.SEGMENT_SIZE:
+                write_segment(buffer[:self.SEGMENT_SIZE])
+                del buffer[:self.SEGMENT_SIZE]
+        write_segment(buffer, last=True)
+    
+    def file_version(self, f):
+        """Returns the format version of a project file, None for Fernet files"""
+        start = f.read(len(self.MAGIC) + 1)
+        f.seek(0)
+        if len(start) == len(self.MAGIC) + 1 and start.startswith(self.MAGIC):
+            return start[-1]
+        return None
+    
+    def read_header(self, f):
+        """Reads the file header, returns (version, header, nonce prefix, segment size)"""
+        header = f.read(len(self.MAGIC) + 8)
+        version = self.file_version(io.BytesIO(header))
+        if version == 1:
+            return version, header, header[-7:], self.SEGMENT_SIZE
+        if version == 2:
+            header += f.read(4)
+            if len(header) == len(self.MAGIC) + 12:
+                return version, header, header[-11:-4], int.from_bytes(header[-4:], "big")
+        raise ValueError(tr("Unsupported file format"))
+    
+    def read_segments(self, f):
+        """Yields the decrypted segments of a project file, each one authenticated on its own"""
+        version, header, prefix, segment_size = self.read_header(f)
+        index = 0
+        length = f.read(4)
+        while True:
+            if len(length) != 4:
+                raise ValueError(tr("File is truncated"))
+            ciphertext = f.read(int.from_bytes(length, "big"))
+            length = f.read(4)
+            last = not length
+            yield self.aead.decrypt(self._nonce(prefix, index, last), ciphertext, header)
+            if last:
+                return
+            index += 1
+    
+    def decrypt_chunks(self, f):
+        """Yields the .dia text of a version 1 project file piece by piece"""
+        if self.file_version(f) != 1:
+            raise ValueError(tr("Not a text project file"))
+        segments = self.read_segments(f)
+        next(segments)
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        for segment in segments:
+            yield decoder.decode(segment)
+        yield decoder.decode(b"", final=True)
+    
+    def read_summary(self, file_path):
+        """Returns the stored project summary without decrypting the data, None for old files"""
+        try:
+            with open(file_path, 'rb') as f:
+                if self.file_version(f) is None:
+                    return None
+                return json.loads(next(self.read_segments(f))) or None
+        except Exception:
+            return None
+    
+    def decrypt_file(self, file_path):
+        """Returns the .dia text of a Fernet or version 1 project file"""
+        with open(file_path, 'rb') as f:
+            if self.file_version(f) is None:
+                # Files of older versions are a single Fernet token
+                return self.decrypt_data(f.read())
+            try:
+                return "".join(self.decrypt_chunks(f))
+            except Exception:
+                return None
+    
+    def decrypt_data(self, encrypted_data):
+        if encrypted_data[:len(self.MAGIC)] == self.MAGIC:
+            try:
+                return "".join(self.decrypt_chunks(io.BytesIO(encrypted_data)))
+            except Exception:
+                return None
+        try:
+            decrypted_data = self.fernet.decrypt(encrypted_data)
+            return decrypted_data.decode()
+        except Exception:
+            return None
+
+class SegmentReader:
+    """Seekable, read-only file over the decrypted content of a version 2 project file
+    
+    progress(fraction) is called after each decrypted segment.
+    """
+    def __init__(self, encryption, f, progress=None):
+        self.encryption = encryption
+        self.f = f
+        self.progress = progress
+        version, self.header, self.prefix, self.segment_size = encryption.read_header(f)
+        if version != 2:
+            raise ValueError(tr("Unsupported file format"))
+        
+        # All segments after the summary have the same size except the last one
+        summary_length = int.from_bytes(f.read(4), "big")
+        self.start = f.tell() + summary_length
+        f.seek(0, os.SEEK_END)
+        content_size = f.tell() - self.start
+        self.stride = 4 + self.segment_size + 16
+        self.count = max(1, -(-content_size // self.stride))
+        last_size = content_size - (self.count - 1) * self.stride - 4 - 16
+        if last_size < 0:
+            raise ValueError(tr("File is truncated"))
+        self.size = (self.count - 1) * self.segment_size + last_size
+        self.position = 0
+        self.cached_index = None
+        self.cached_segment = b""
+    
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self.position
+        elif whence == os.SEEK_END:
+            offset += self.size
+        self.position = max(0, offset)
+        return self.position
+    
+    def tell(self):
+        return self.position
+    
+    def read(self, size=-1):
+        end = self.size if size < 0 else min(self.position + size, self.size)
+        pieces = []
+        while self.position < end:
+            index, offset = divmod(self.position, self.segment_size)
+            piece = self.segment(index)[offset:offset + end - self.position]
+            if not piece:
+                break
+            pieces.append(piece)
+            self.position += len(piece)
+        return b"".join(pieces)
+    
+    def segment(self, index):
+        """Decrypts a single segment, the last one is kept for the following reads"""
+        if index != self.cached_index:
+            self.f.seek(self.start + index * self.stride)
+            length = int.from_bytes(self.f.read(4), "big")
+            ciphertext = self.f.read(length)
+            # Segment 0 is the summary
+            nonce = self.encryption._nonce(self.prefix, index + 1, index == self.count - 1)
+            self.cached_segment = self.encryption.aead.decrypt(nonce, ciphertext, self.header)
+            self.cached_index = index
+            if self.progress is not None:
+                self.progress((index + 1) / self.count)
+        return self.cached_segment
@@ -0,0 +1,113 @@
+"""Patterns and helpers of the .dia text and binary formats"""
+import re
+import json
+import struct
+
+from .texts import tr
+
+# Precompiled patterns for the .dia text format
+# Not anchored at the line start, which makes scanning much faster (checked in from_dia_format)
+DIA_SECTION = re.compile(r'\[__(\w+)__\][ \t]*\r?$', re.M)
+DIA_SETTINGS = re.compile(r'\[Project Settings:.*?created="([^"]+)" modified="([^"]+)"')
+DIA_INFO = re.compile(r'\[(\w+):\s*"([^"]+)"')
+DIA_DATA_ROW = re.compile(r'\[(.*)\|([^|]*)\|([^|]*)\]$')
+# All data rows and all non-empty lines of a section at once (sections start at a line end)
+DIA_DATA_ROWS = re.compile(r'\n[ \t]*\[(.*?)\|([^|\n]*)\|([^|\n]*)\][ \t]*\r?$', re.M)
+DIA_CONTENT_LINE = re.compile(r'\n[^\S\n]*[^\s#]')
+DIA_CUSTOM_COLOR = re.compile(r'\[([^:]*):(.*)\]$')
+# Characters of labels that a data row cannot hold as they are; other backslashes are kept,
+# so labels of older files like C:\temp read the same
+DIA_LABEL_ESCAPES = str.maketrans({"\\": "\\\\", "\n": "\\n", "\r": "\\r", "|": "\\|"})
+DIA_LABEL_ESCAPE = re.compile(r'\\([\\nr|])')
+DIA_LABEL_UNESCAPES = {"\\": "\\", "n": "\n", "r": "\r", "|": "|"}
+# Project attribute for each [__DiaInfo__] entry
+DIA_INFO_FIELDS = {
+    "Name": "name",
+    "Type": "chart_type",
+    "ColorScheme": "color_scheme",
+    "Title": "title"
+}
+
+# Binary .dia v2: magic, compressed sections, table of contents (JSON) and a trailer
+# with the offset and length of the table of contents followed by the magic again
+DIA_BINARY_MAGIC = b"DIA2"
+DIA_BINARY_VERSION = 2
+DIA_BINARY_TRAILER = struct.Struct('<QI')
+DIA_BINARY_COMPRESSION = 1
+
+class DiaParseError(ValueError):
+    """Invalid .dia content, with the line and column where it was found"""
+    def __init__(self, message, line, column=1):
+        super().__init__(tr("Line {line}, column {column}: {message}").format(line=line, column=column, message=message))
+        self.message = message
+        self.line = line
+        self.column = column
+
+def escape_labels(labels):
+    """Escapes labels for the data rows of the .dia text format"""
+    # Labels rarely need it, so they are checked all at once
+    joined = "".join(labels)
+    if not any(character in joined for character in "\\\n\r|"):
+        return labels
+    return [label.translate(DIA_LABEL_ESCAPES) for label in labels]
+
+def unescape_label(label):
+    """Reverses the escaping of a label by escape_labels"""
+    return DIA_LABEL_ESCAPE.sub(lambda match: DIA_LABEL_UNESCAPES[match.group(1)], label)
+
+def iter_json_list(items, chunk_size):
+    """Yields a JSON list of items as encoded pieces of chunk_size items"""
+    yield b"["
+    for start in range(0, len(items), chunk_size):
+        piece = json.dumps(items[start:start + chunk_size], ensure_ascii=False)[1:-1]
+        yield (piece if start == 0 else "," + piece).encode()
+    yield b"]"
+
+def parse_dia_rows(dia_content, start, end, skipped=None):
+    """Parses the rows of a [__Data__] section between start and end into columns
+    
+    Without a skipped list the first invalid row raises DiaParseError, otherwise its
+    error is appended to skipped and the row is left out.
+    """
+    rows = DIA_DATA_ROWS.findall(dia_content, start, end)
+    if len(rows) == len(DIA_CONTENT_LINE.findall(dia_content, start, end)):
+        try:
+            values = list(map(float, [row[1] for row in rows]))
+        except ValueError:
+            pass
+        else:
+            labels = [row[0].strip() for row in rows]
+            if dia_content.find('\\', start, end) != -1:
+                labels = list(map(unescape_label, labels))
+            return labels, values, [row[2].strip() for row in rows]
+    
+    # Line by line, to report the position of the first invalid row
+    labels = []
+    values = []
+    colors = []
+    first_line = dia_content.count('\n', 0, start) + 1
+    for number, raw_line in enumerate(dia_content[start:end].split('\n'), first_line):
+        line = raw_line.strip()
+        if not line or line[0] == '#':
+            continue
+        match = DIA_DATA_ROW.match(line)
+        if not match:
+            column = len(raw_line) - len(raw_line.lstrip()) + 1
+            error = DiaParseError(tr("Expected [label | value | color]"), number, column)
+            if skipped is None:
+                raise error
+            skipped.append(error)
+            continue
+        label, value, color = match.groups()
+        try:
+            values.append(float(value))
+        except ValueError:
+            column = raw_line.rindex(f"|{value}|") + 2 + len(value) - len(value.lstrip())
+            error = DiaParseError(tr("Invalid value '{value}'").format(value=value.strip()), number, column)
+            if skipped is None:
+                raise error from None
+            skipped.append(error)
+            continue
+        labels.append(unescape_label(label.strip()))
+        colors.append(color.strip())
+    return labels, values, colors
@@ -0,0 +1,85 @@
+"""Export of a chart to several image files at once, rendered in worker processes"""
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import os
+import io
+
+from .files import atomic_write
+from .jobs import worker_pool, iter_results
+from .renderer import create_renderer, export_figure
+
+# Image formats of an export; vector formats are written once, raster formats per resolution
+EXPORT_FORMATS = ("png", "jpg", "svg", "pdf")
+RASTER_FORMATS = ("png", "jpg")
+
+def export_targets(base_path, formats, dpis):
+    """Returns (file path, format, dpi) of each image, base_path is the path without extension
+    
+    With several resolutions the raster images are named like chart_600dpi.png.
+    """
+    targets = []
+    for file_format in formats:
+        if file_format not in RASTER_FORMATS:
+            targets.append((f"{base_path}.{file_format}", file_format, dpis[0]))
+            continue
+        for dpi in dpis:
+            suffix = f"_{dpi}dpi" if len(dpis) > 1 else ""
+            targets.append((f"{base_path}{suffix}.{file_format}", file_format, dpi))
+    return targets
+
+def render_image(project, file_format, dpi=300, full_resolution=False, aggregation="top", view=None):
+    """Renders the chart of a project as image bytes; runs in worker processes"""
+    figure = Figure(figsize=(project.width, project.height), facecolor='#2B2B2B')
+    FigureCanvasAgg(figure)
+    renderer = create_renderer(figure, project.chart_type, full_resolution, aggregation)
+    renderer.render(project)
+    if view is not None:
+        renderer.set_view(view)
+    buffer = io.BytesIO()
+    export_figure(figure, buffer, dpi, file_format)
+    return buffer.getvalue()
+
+def render_target(job):
+    """Renders a (project, target, options) job, returns (file path, image bytes or error); runs in worker processes"""
+    project, (file_path, file_format, dpi), options = job
+    try:
+        return file_path, render_image(project, file_format, dpi, *options)
+    except Exception as e:
+        return file_path, e
+
+class ChartExport:
+    """Writes the chart of a project snapshot to several image files
+    
+    Each image is rendered in a worker process and written once it is complete, so a
+    stopped export leaves no partly written files. Images that failed are listed in failed
+    as (file path, error).
+    """
+    def __init__(self, project, targets, full_resolution=False, aggregation="top", view=None):
+        self.project = project
+        self.targets = targets
+        self.options = (full_resolution, aggregation, view)
+        self.written = []
+        self.failed = []
+    
+    def run(self, progress=None, max_workers=None):
+        """Renders the images, progress(fraction) may raise to stop the export"""
+        count = len(self.targets)
+        jobs = [(self.project, target, self.options) for target in self.targets]
+        
+        def report():
+            if progress is not None:
+                progress((len(self.written) + len(self.failed)) / count)
+        
+        # Leaving the pool terminates its workers, a stopped export renders no further
+        with worker_pool(max_workers or min(count, os.cpu_count() or 1)) as pool:
+            for file_path, image in iter_results(pool, render_target, jobs, report):
+                if isinstance(image, Exception):
+                    self.failed.append((file_path, image))
+                else:
+                    try:
+                        atomic_write(file_path, image)
+                        self.written.append(file_path)
+                    except Exception as e:
+                        self.failed.append((file_path, e))
+                report()
+        return self
@@ -0,0 +1,32 @@
+"""File system helpers shared by the project store and the key cache"""
+import os
+
+def get_app_data_dir():
+    """Returns the DiaDrop data directory"""
+    return os.path.join(os.getenv('APPDATA') or os.path.expanduser('~'), 'DiaDrop')
+
+def atomic_write(file_path, data, mode=0o666):
+    """Writes data (bytes or a function writing to the file) to a temporary file and atomically replaces file_path with it"""
+    temp_path = f"{file_path}.tmp"
+    try:
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), mode)
+        with os.fdopen(fd, 'wb') as f:
+            if callable(data):
+                data(f)
+            else:
+                f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, file_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    
+    # Make the rename itself durable (directories cannot be opened on Windows)
+    if os.name != 'nt':
+        dir_fd = os.open(os.path.dirname(os.path.abspath(file_path)), os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
@@ -0,0 +1,346 @@
+"""Streaming import of label/value tables from Excel, CSV, TSV and Parquet files"""
+import numpy as np
+import os
+import csv
+import io
+import math
+import datetime
+import itertools
+import re
+
+from .model import DataTable
+from .texts import tr
+
+# File types read by TableReader
+TABLE_EXTENSIONS = (".xlsx", ".xlsm", ".xls", ".csv", ".tsv", ".txt", ".parquet")
+
+class TableImportError(ValueError):
+    """A table file that cannot be imported at all"""
+
+class ValueParser:
+    """Converts value cells to floats, inferring the decimal separator of text columns"""
+    # A single separator followed by three digits may be a decimal or group thousands
+    AMBIGUOUS = re.compile(r'[+-]?[1-9]\d{0,2}[.,]\d{3}')
+    
+    def __init__(self):
+        # ',' or '.' once a value showed which one the column uses
+        self.decimal = None
+        # True if the last value was read as grouped thousands before the separator was known
+        self.ambiguous = False
+    
+    def parse(self, cell):
+        self.ambiguous = False
+        if cell is None or isinstance(cell, bool):
+            raise ValueError(tr("Missing value") if cell is None else tr("Invalid value '{value}'").format(value=cell))
+        if isinstance(cell, (int, float)):
+            value = float(cell)
+            if math.isnan(value):
+                raise ValueError(tr("Missing value"))
+            return value
+        if not isinstance(cell, str):
+            raise ValueError(tr("Invalid value '{value}'").format(value=cell))
+        
+        # Spaces and apostrophes are only used to group digits
+        text = "".join(cell.split()).replace("'", "")
+        if not text:
+            raise ValueError(tr("Missing value"))
+        try:
+            value = self.parse_text(text)
+        except ValueError:
+            raise ValueError(tr("Invalid value '{value}'").format(value=cell.strip())) from None
+        if not math.isfinite(value):
+            raise ValueError(tr("Invalid value '{value}'").format(value=cell.strip()))
+        return value
+    
+    def parse_text(self, text):
+        decimal = self.decimal
+        if "," in text and "." in text:
+            decimal = "," if text.rindex(",") > text.rindex(".") else "."
+        elif text.count(",") > 1:
+            decimal = "."
+        elif text.count(".") > 1:
+            decimal = ","
+        elif decimal is None and ("," in text or "." in text):
+            if self.AMBIGUOUS.fullmatch(text):
+                # Read as thousands until another value of the column shows the separator
+                self.ambiguous = True
+                return float(text.replace(",", "").replace(".", ""))
+            decimal = "," if "," in text else "."
+        
+        if decimal is not None and self.decimal is None:
+            self.decimal = decimal
+        if decimal == ",":
+            text = text.replace(".", "").replace(",", ".")
+        elif decimal == ".":
+            text = text.replace(",", "")
+        return float(text)
+
+def format_label(cell):
+    """Returns the text of a label cell on one line, runs of whitespace become one space"""
+    if cell is None:
+        return ""
+    if isinstance(cell, float) and cell.is_integer():
+        return str(int(cell))
+    if isinstance(cell, datetime.datetime) and cell.time() == datetime.time():
+        return cell.date().isoformat()
+    return " ".join(str(cell).split())
+
+def is_empty(cell):
+    return cell is None or (isinstance(cell, str) and not cell.strip())
+
+class TableReader:
+    """Reads the first two columns (label, value) of a table file in chunks
+    
+    A first row without a number is taken as header. Rows whose value cannot be read
+    are skipped and the first MAX_SKIPPED of them are listed in skipped as (row, reason).
+    Values like 1,000 in a column that never shows its decimal separator are read as
+    thousands, the first MAX_SKIPPED of their rows are listed in ambiguous.
+    """
+    CHUNK_ROWS = 10000
+    MAX_SKIPPED = 1000
+    # Cell types the fast path converts with float()
+    NUMBER_TYPES = {str, float, int}
+    
+    def __init__(self, file_path, chunk_rows=CHUNK_ROWS):
+        self.file_path = file_path
+        self.extension = os.path.splitext(file_path)[1].lower()
+        if self.extension not in TABLE_EXTENSIONS:
+            raise TableImportError(tr("Unsupported file type: {extension}").format(extension=self.extension or file_path))
+        self.chunk_rows = chunk_rows
+        self.parser = ValueParser()
+        # Parquet files have named columns, their first row is always data
+        self.header_pending = self.extension != ".parquet"
+        self.header = None
+        self.skipped = []
+        self.skipped_count = 0
+        self.ambiguous = []
+        self.ambiguous_count = 0
+        # (index in the table, row, cell) of values read before the separator was known
+        self.pending = []
+        self.row_count = 0
+        self.progress = 0.0
+    
+    def chunks(self):
+        """Yields (labels, values) of up to chunk_rows rows, progress is updated before each
+        
+        Rows with values like 1,000 are held back until the column shows its decimal
+        separator, empty chunks are yielded meanwhile.
+        """
+        held = []
+        for number, rows, progress in self.batches():
+            if self.header_pending:
+                number, rows = self.take_header(number, rows)
+            labels, values = self.convert(number, rows)
+            self.row_count += len(labels)
+            self.progress = progress
+            if self.pending:
+                held.append((labels, values))
+                if self.parser.decimal is None:
+                    yield [], []
+                else:
+                    yield self.release(held)
+                    held = []
+            elif labels:
+                yield labels, values
+        self.progress = 1.0
+        if held:
+            yield self.release(held)
+    
+    def release(self, held):
+        """Joins held back chunks, their pending values are read again with the known separator"""
+        labels = list(itertools.chain.from_iterable(chunk[0] for chunk in held))
+        values = np.concatenate([np.asarray(chunk[1], dtype=float) for chunk in held])
+        start = self.row_count - len(values)
+        for index, row, cell in self.pending:
+            if self.parser.decimal is not None:
+                values[index - start] = self.parser.parse(cell)
+            else:
+                # Nothing showed the separator, the value stays read as thousands
+                self.ambiguous_count += 1
+                if len(self.ambiguous) < self.MAX_SKIPPED:
+                    self.ambiguous.append(row)
+        self.pending = []
+        return labels, values
+    
+    def take_header(self, number, rows):
+        """Checks the first non-empty row for a header, returns the rows after it"""
+        for offset, cells in enumerate(rows):
+            label, value = (tuple(cells) + (None, None))[:2]
+            if is_empty(label) and is_empty(value):
+                continue
+            self.header_pending = False
+            try:
+                self.parser.parse(value)
+            except ValueError:
+                self.header = (format_label(label), format_label(value))
+                return number + offset + 1, rows[offset + 1:]
+            return number + offset, rows[offset:]
+        return number + len(rows), []
+    
+    def convert(self, number, rows):
+        """Converts a batch of rows starting at row number to labels and values"""
+        try:
+            label_cells = [cells[0] for cells in rows]
+            value_cells = [cells[1] for cells in rows]
+            # Fast path for plain numbers; decimal commas, gaps and errors are handled row by row
+            if self.plain_numbers(value_cells):
+                values = np.array(list(map(float, value_cells)))
+                if np.isfinite(values).all():
+                    if set(map(type, label_cells)) == {str}:
+                        labels = list(map(str.strip, label_cells))
+                        # Line breaks and runs of spaces are rare, so the labels are checked at once
+                        joined = "".join(labels)
+                        if "  " in joined or not joined.isprintable():
+                            labels = list(map(format_label, labels))
+                        return labels, values
+                    return list(map(format_label, label_cells)), values
+        except (IndexError, ValueError):
+            pass
+        
+        labels = []
+        values = []
+        for offset, cells in enumerate(rows):
+            label, value = (tuple(cells) + (None, None))[:2]
+            if is_empty(label) and is_empty(value):
+                continue
+            try:
+                values.append(self.parser.parse(value))
+            except ValueError as e:
+                self.skip(number + offset, str(e))
+                continue
+            if self.parser.ambiguous:
+                self.pending.append((self.row_count + len(labels), number + offset, value))
+            labels.append(format_label(label))
+        return labels, values
+    
+    def plain_numbers(self, value_cells):
+        """True if float() reads all value cells the way the column means them"""
+        value_types = set(map(type, value_cells))
+        if not value_types <= self.NUMBER_TYPES or self.parser.decimal == ",":
+            return False
+        if self.parser.decimal == ".":
+            return True
+        # While the separator is unknown a point in a text cell may group thousands
+        texts = value_cells if value_types == {str} else [cell for cell in value_cells if type(cell) is str]
+        return "." not in "".join(texts)
+    
+    def skip(self, row, reason):
+        self.skipped_count += 1
+        if len(self.skipped) < self.MAX_SKIPPED:
+            self.skipped.append((row, reason))
+    
+    def batches(self):
+        """Yields (number of the first row, rows, progress) for batches of chunk_rows rows"""
+        if self.extension in (".xlsx", ".xlsm"):
+            return self.excel_batches()
+        if self.extension == ".xls":
+            return self.xls_batches()
+        if self.extension == ".parquet":
+            return self.parquet_batches()
+        return self.csv_batches()
+    
+    def excel_batches(self):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise TableImportError(tr("Reading Excel files needs the openpyxl package")) from None
+        
+        # Read-only mode streams the sheet instead of loading the whole workbook
+        workbook = load_workbook(self.file_path, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            total = sheet.max_row or 0
+            rows = sheet.iter_rows(max_col=2, values_only=True)
+            number = 1
+            while True:
+                batch = list(itertools.islice(rows, self.chunk_rows))
+                if not batch:
+                    return
+                yield number, batch, min((number + len(batch) - 1) / total, 1.0) if total else 0.0
+                number += len(batch)
+        finally:
+            workbook.close()
+    
+    def xls_batches(self):
+        # The old binary format cannot be streamed, pandas reads only the two columns
+        import pandas as pd
+        try:
+            frame = pd.read_excel(self.file_path, header=None, usecols=[0, 1], dtype=object)
+        except ImportError:
+            raise TableImportError(tr("Reading .xls files needs the xlrd package")) from None
+        frame = frame.astype(object).where(frame.notna(), None)
+        total = len(frame)
+        for start in range(0, total, self.chunk_rows):
+            batch = list(frame.iloc[start:start + self.chunk_rows].itertuples(index=False, name=None))
+            yield start + 1, batch, (start + len(batch)) / total
+    
+    def parquet_batches(self):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise TableImportError(tr("Reading Parquet files needs the pyarrow package")) from None
+        
+        parquet = pq.ParquetFile(self.file_path)
+        columns = parquet.schema_arrow.names[:2]
+        if len(columns) < 2:
+            raise TableImportError(tr("The table needs at least two columns"))
+        self.header = tuple(columns)
+        total = parquet.metadata.num_rows
+        number = 1
+        for batch in parquet.iter_batches(batch_size=self.chunk_rows, columns=columns):
+            rows = list(zip(batch.column(0).to_pylist(), batch.column(1).to_pylist()))
+            yield number, rows, (number + len(rows) - 1) / total
+            number += len(rows)
+    
+    def csv_batches(self):
+        size = os.path.getsize(self.file_path)
+        with open(self.file_path, 'rb') as raw:
+            sample = raw.read(65536)
+            raw.seek(0)
+            encoding = self.detect_encoding(sample)
+            if self.extension == ".tsv":
+                delimiter = "\t"
+            else:
+                try:
+                    text = sample.decode(encoding, errors='replace')
+                    delimiter = csv.Sniffer().sniff(text, delimiters=",;\t|").delimiter
+                except csv.Error:
+                    delimiter = ","
+            
+            # The position of the binary file gives the progress
+            with io.TextIOWrapper(raw, encoding=encoding, errors='replace', newline='') as f:
+                rows = csv.reader(f, delimiter=delimiter)
+                number = 1
+                while True:
+                    batch = list(itertools.islice(rows, self.chunk_rows))
+                    if not batch:
+                        return
+                    yield number, batch, raw.tell() / size if size else 1.0
+                    number += len(batch)
+    
+    @staticmethod
+    def detect_encoding(sample):
+        """UTF-8 (with or without BOM), otherwise the Windows code page Excel writes"""
+        try:
+            sample.decode('utf-8')
+        except UnicodeDecodeError as e:
+            # The sample may end inside a character
+            if e.start < len(sample) - 3:
+                return 'cp1252'
+        return 'utf-8-sig'
+
+def read_table(file_path, colors, progress=None, chunk_rows=TableReader.CHUNK_ROWS):
+    """Reads a table file into a new DataTable, returns the table and the reader
+    
+    progress(fraction) is called after every chunk and may raise JobCancelled to stop,
+    colors repeat over the rows.
+    """
+    reader = TableReader(file_path, chunk_rows)
+    table = DataTable()
+    for labels, values in reader.chunks():
+        if labels:
+            offset = len(table) % len(colors)
+            table.extend(labels, values, colors[offset:] + colors[:offset])
+        if progress is not None:
+            progress(reader.progress)
+    return table, reader
@@ -0,0 +1,28 @@
+"""Background jobs of imports and exports and their worker processes"""
+import multiprocessing
+
+class JobCancelled(Exception):
+    """Raised by a progress callback to stop an import or export"""
+
+def worker_pool(count):
+    """Returns a pool of count worker processes, leaving its with block terminates them
+    
+    The workers are spawned: the apps start pools from background threads of a process
+    that runs Tk and matplotlib, which fork would copy into every worker.
+    """
+    return multiprocessing.get_context("spawn").Pool(count)
+
+def iter_results(pool, function, items, poll, interval=0.2):
+    """Yields function(item) for each item in the order they finish
+    
+    poll() is called every interval while waiting and may raise to stop, so a stopped job
+    does not wait for the next result.
+    """
+    results = pool.imap_unordered(function, items)
+    while True:
+        try:
+            yield results.next(interval)
+        except multiprocessing.TimeoutError:
+            poll()
+        except StopIteration:
+            return
@@ -0,0 +1,489 @@
+"""Project model: data table and diagram project with (de)serialization"""
+import numpy as np
+import os
+from datetime import datetime
+import copy
+import hashlib
+import json
+import sys
+import itertools
+import zlib
+
+from .dia_format import (
+    DIA_SECTION, DIA_SETTINGS, DIA_INFO, DIA_CUSTOM_COLOR, DIA_INFO_FIELDS,
+    DIA_BINARY_MAGIC, DIA_BINARY_VERSION, DIA_BINARY_TRAILER, DIA_BINARY_COMPRESSION,
+    escape_labels, iter_json_list, parse_dia_rows
+)
+from .texts import tr, original
+
+# Extended color palettes
+COLOR_SCHEMES = {
+    "Modern Blue": ["#0066FF", "#00B4D8", "#90E0EF", "#CAF0F8", "#ADE8F4"],
+    "Sunset": ["#FF6B35", "#F7931E", "#FDC830", "#F37335", "#C44536"],
+    "Forest": ["#2D6A4F", "#40916C", "#52B788", "#74C69D", "#95D5B2"],
+    "Purple Haze": ["#7209B7", "#9D4EDD", "#C77DFF", "#E0AAFF", "#F0D9FF"],
+    "Ocean": ["#03045E", "#023E8A", "#0077B6", "#0096C7", "#00B4D8"],
+    "Neon": ["#FF006E", "#FB5607", "#FFBE0B", "#3A86FF", "#8338EC"],
+    "Pastel": ["#FFADAD", "#FFD6A5", "#FDFFB6", "#CAFFBF", "#9BF6FF"],
+    "Earth": ["#D4A373", "#BC6C25", "#606C38", "#283618", "#FEFAE0"],
+    "Ruby": ["#590D22", "#800F2F", "#A4133C", "#C9184A", "#FF4D6D"],
+    "Ice": ["#012A4A", "#013A63", "#01497C", "#014F86", "#2A6F97"]
+}
+
+def scheme_colors(name):
+    """Returns the colors of a color scheme, its name may be translated"""
+    return COLOR_SCHEMES[original(name)]
+
+class DataTable:
+    """Column oriented storage for the data rows of a project"""
+    def __init__(self):
+        self._labels = []
+        # Values and color codes grow geometrically, only the first _size entries are used
+        self._values = np.empty(16)
+        self._color_codes = np.empty(16, dtype=np.int32)
+        self._palette = []
+        self._palette_codes = {}
+        self._size = 0
+        self._colors = None
+        self._version = 0
+        # (version, hex digest) of the last digest()
+        self._digest = None
+    
+    def __len__(self):
+        return self._size
+    
+    @property
+    def version(self):
+        """Number of changes so far, caches of derived data compare it"""
+        return self._version
+    
+    @property
+    def labels(self):
+        """The label column (shared, do not modify)"""
+        return self._labels
+    
+    @property
+    def values(self):
+        """Read-only view on the value column"""
+        view = self._values[:self._size]
+        view.flags.writeable = False
+        return view
+    
+    @property
+    def color_codes(self):
+        """Read-only view on the color codes, indexes into palette"""
+        view = self._color_codes[:self._size]
+        view.flags.writeable = False
+        return view
+    
+    @property
+    def palette(self):
+        return self._palette
+    
+    @property
+    def colors(self):
+        """The color column (cached, do not modify)"""
+        if self._colors is None:
+            palette = np.empty(len(self._palette), dtype=object)
+            palette[:] = self._palette
+            self._colors = palette[self._color_codes[:self._size]].tolist()
+        return self._colors
+    
+    @classmethod
+    def from_columns(cls, labels, values, color_codes, palette):
+        """Builds a table from complete columns without going row by row"""
+        count = len(values)
+        if len(labels) != count or len(color_codes) != count:
+            raise ValueError(tr("Columns differ in length"))
+        if count and color_codes.max() >= len(palette):
+            raise ValueError(tr("Invalid color code"))
+        
+        table = cls()
+        table._labels = list(map(sys.intern, labels))
+        table._values = np.array(values, dtype=float)
+        table._color_codes = np.array(color_codes, dtype=np.int32)
+        table._palette = list(palette)
+        table._palette_codes = {color: code for code, color in enumerate(table._palette)}
+        table._size = count
+        return table
+    
+    def row(self, row):
+        if not -self._size <= row < self._size:
+            raise IndexError(tr("Row out of range"))
+        row %= self._size
+        return self._labels[row], float(self._values[row]), self._palette[self._color_codes[row]]
+    
+    def rows(self):
+        return zip(self._labels, self.values.tolist(), self.colors)
+    
+    def _color_code(self, color):
+        code = self._palette_codes.get(color)
+        if code is None:
+            code = len(self._palette)
+            self._palette.append(color)
+            self._palette_codes[color] = code
+        return code
+    
+    def _cycle_codes(self, colors, count):
+        if not colors:
+            raise ValueError(tr("No colors given"))
+        for color in dict.fromkeys(colors):
+            self._color_code(color)
+        codes = np.fromiter(map(self._palette_codes.__getitem__, colors), dtype=np.int32, count=len(colors))
+        if len(codes) == count:
+            return codes
+        return codes[np.arange(count) % len(codes)]
+    
+    def _reserve(self, size):
+        capacity = len(self._values)
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2, 16)
+        values = np.empty(capacity)
+        values[:self._size] = self._values[:self._size]
+        color_codes = np.empty(capacity, dtype=np.int32)
+        color_codes[:self._size] = self._color_codes[:self._size]
+        self._values = values
+        self._color_codes = color_codes
+    
+    def append(self, label, value, color):
+        self._reserve(self._size + 1)
+        self._labels.append(sys.intern(label))
+        self._values[self._size] = value
+        self._color_codes[self._size] = self._color_code(color)
+        self._size += 1
+        self._colors = None
+        self._version += 1
+    
+    def extend(self, labels, values, colors):
+        """Appends many rows at once, colors are repeated if there are fewer than rows"""
+        values = np.asarray(values, dtype=float)
+        count = len(values)
+        if len(labels) != count:
+            raise ValueError(tr("Labels and values differ in length"))
+        if count == 0:
+            return
+        
+        end = self._size + count
+        self._reserve(end)
+        self._labels.extend(map(sys.intern, map(str, labels)))
+        self._values[self._size:end] = values
+        self._color_codes[self._size:end] = self._cycle_codes(colors, count)
+        self._size = end
+        self._colors = None
+        self._version += 1
+    
+    def delete(self, rows):
+        """Deletes one or more rows"""
+        keep = np.ones(self._size, dtype=bool)
+        keep[rows] = False
+        size = int(keep.sum())
+        self._labels = list(itertools.compress(self._labels, keep))
+        self._values[:size] = self._values[:self._size][keep]
+        self._color_codes[:size] = self._color_codes[:self._size][keep]
+        self._size = size
+        self._colors = None
+        self._version += 1
+    
+    def set_color(self, row, color):
+        if not -self._size <= row < self._size:
+            raise IndexError(tr("Row out of range"))
+        self._color_codes[row % self._size] = self._color_code(color)
+        self._colors = None
+        self._version += 1
+    
+    def fill_colors(self, colors):
+        """Recolors all rows by repeating the given colors"""
+        self._palette = []
+        self._palette_codes = {}
+        self._color_codes[:self._size] = self._cycle_codes(colors, self._size)
+        self._colors = None
+        self._version += 1
+    
+    def digest(self):
+        """SHA-256 of labels, values and colors, computed once per version"""
+        if self._digest is None or self._digest[0] != self._version:
+            digest = hashlib.sha256()
+            for chunk in iter_json_list(self._labels, 4096):
+                digest.update(chunk)
+            digest.update(self.values.astype('<f8').tobytes())
+            digest.update(json.dumps(self.colors).encode())
+            self._digest = (self._version, digest.hexdigest())
+        return self._digest[1]
+    
+    def copy(self):
+        table = copy.copy(self)
+        table._labels = list(self._labels)
+        table._values = self._values[:self._size].copy()
+        table._color_codes = self._color_codes[:self._size].copy()
+        table._palette = list(self._palette)
+        table._palette_codes = dict(self._palette_codes)
+        return table
+
+class DiagramProject:
+    def __init__(self, name=None):
+        self.name = tr("New Project") if name is None else name
+        self.created = datetime.now().isoformat()
+        self.modified = datetime.now().isoformat()
+        self.data = DataTable()
+        self.chart_type = tr("Bar")
+        self.color_scheme = "Modern Blue"
+        self.title = tr("My Chart")
+        # Fixed diagram size (no longer changeable)
+        self.width = 10
+        self.height = 6
+        self.custom_colors = {}
+        # Revision counter for unsaved changes
+        self.revision = 0
+        self.saved_revision = 0
+        # Edits since the last save (None = a full save is required)
+        self.pending_edits = []
+        self.journal_size = 0
+    
+    @property
+    def is_dirty(self):
+        return self.revision != self.saved_revision
+    
+    def mark_dirty(self, edit=None):
+        self.revision += 1
+        if edit is None:
+            self.pending_edits = None
+        elif self.pending_edits is not None:
+            self.pending_edits.append(edit)
+    
+    def take_edits(self):
+        edits = self.pending_edits
+        self.pending_edits = []
+        return edits
+    
+    def apply_edit(self, edit):
+        """Applies a single edit, used by the editor and for journal replay"""
+        op = edit["op"]
+        if op == "add":
+            self.data.append(edit["label"], edit["value"], edit["color"])
+        elif op == "remove":
+            self.data.delete(edit["row"])
+        elif op == "color":
+            self.data.set_color(edit["row"], edit["color"])
+        elif op == "clear":
+            self.data = DataTable()
+        elif op == "scheme":
+            self.color_scheme = edit["scheme"]
+            self.data.fill_colors(scheme_colors(edit["scheme"]))
+        elif op == "settings":
+            self.chart_type = edit["chart_type"]
+            self.title = edit["title"]
+        else:
+            raise ValueError(tr("Unknown edit: {op}").format(op=op))
+    
+    def summary(self):
+        """Metadata stored in the first segment of project files, readable without the data"""
+        return {
+            "name": self.name,
+            "created": self.created,
+            "modified": self.modified,
+            "chart_type": self.chart_type,
+            "row_count": len(self.data)
+        }
+    
+    def content_hash(self):
+        """Hash of what the chart shows (settings and data), independent of name and dates"""
+        digest = hashlib.sha256()
+        settings = [self.chart_type, self.color_scheme, self.title, self.width, self.height,
+                    sorted(self.custom_colors.items())]
+        digest.update(json.dumps(settings, ensure_ascii=False).encode())
+        digest.update(self.data.digest().encode())
+        return digest.hexdigest()
+    
+    def snapshot(self):
+        """Returns an independent copy that can be saved in the background"""
+        snapshot = copy.copy(self)
+        snapshot.data = self.data.copy()
+        snapshot.custom_colors = dict(self.custom_colors)
+        return snapshot
+    
+    def to_dia_format(self):
+        """Convert project to .dia format"""
+        return "".join(self.iter_dia_format())
+    
+    def iter_dia_format(self, chunk_rows=4096):
+        """Yields the .dia format in pieces, data rows chunk_rows at a time"""
+        dia_content = ["[<TYPE dia>]", ""]
+        
+        # Settings Section
+        dia_content.append("[__Settings__]")
+        dia_content.append(f"[Project Settings: created=\"{self.created}\" modified=\"{self.modified}\"]")
+        dia_content.append("")
+        
+        # Data Section
+        dia_content.append("[__Data__]")
+        yield "\n".join(dia_content) + "\n"
+        
+        labels = self.data.labels
+        values = self.data.values
+        colors = self.data.colors
+        for start in range(0, len(self.data), chunk_rows):
+            end = start + chunk_rows
+            yield "".join([
+                f"[{label} | {value} | {color}]\n"
+                for label, value, color in zip(escape_labels(labels[start:end]), values[start:end].tolist(), colors[start:end])
+            ])
+        
+        dia_content = [""]
+        
+        # DiaInfo Section
+        dia_content.append("[__DiaInfo__]")
+        dia_content.append(f"[Name: \"{self.name}\"]")
+        dia_content.append(f"[{tr('Type')}: \"{self.chart_type}\"]")
+        dia_content.append(f"[{tr('ColorScheme')}: \"{self.color_scheme}\"]")
+        dia_content.append(f"[{tr('Title')}: \"{self.title}\"]")
+        # Size no longer included in format since it's fixed
+        dia_content.append("")
+        
+        # Custom Colors
+        if self.custom_colors:
+            dia_content.append("[__CustomColors__]")
+            for key, color in self.custom_colors.items():
+                dia_content.append(f"[{key}: {color}]")
+            dia_content.append("")
+        
+        dia_content.append(tr("# .dia File - DiaDrop Chart Format"))
+        
+        yield "\n".join(dia_content)
+    
+    def iter_dia_binary(self, chunk_rows=65536):
+        """Yields the binary .dia v2 format in pieces"""
+        data = self.data
+        rows = range(0, len(data), chunk_rows)
+        sections = [
+            ("Settings", [json.dumps({"created": self.created, "modified": self.modified}).encode()]),
+            ("DiaInfo", [json.dumps({
+                "name": self.name,
+                "chart_type": self.chart_type,
+                "color_scheme": self.color_scheme,
+                "title": self.title
+            }).encode()]),
+            ("CustomColors", [json.dumps(self.custom_colors).encode()]),
+            ("Data/labels", iter_json_list(data.labels, chunk_rows)),
+            ("Data/values", (data.values[start:start + chunk_rows].astype('<f8').tobytes() for start in rows)),
+            ("Data/colors", (data.color_codes[start:start + chunk_rows].astype('<u4').tobytes() for start in rows)),
+            ("Data/palette", [json.dumps(data.palette).encode()])
+        ]
+        
+        yield DIA_BINARY_MAGIC
+        offset = len(DIA_BINARY_MAGIC)
+        toc = {}
+        for name, pieces in sections:
+            compressor = zlib.compressobj(DIA_BINARY_COMPRESSION)
+            start = offset
+            raw_length = 0
+            for piece in pieces:
+                raw_length += len(piece)
+                compressed = compressor.compress(piece)
+                offset += len(compressed)
+                yield compressed
+            compressed = compressor.flush()
+            offset += len(compressed)
+            yield compressed
+            toc[name] = [start, offset - start, raw_length]
+        
+        toc_data = json.dumps({"version": DIA_BINARY_VERSION, "sections": toc}).encode()
+        yield toc_data + DIA_BINARY_TRAILER.pack(offset, len(toc_data)) + DIA_BINARY_MAGIC
+    
+    def from_dia_binary(self, f):
+        """Load project from the binary .dia v2 format, f has to be seekable"""
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        trailer_size = DIA_BINARY_TRAILER.size + len(DIA_BINARY_MAGIC)
+        f.seek(0)
+        if size < len(DIA_BINARY_MAGIC) + trailer_size or f.read(len(DIA_BINARY_MAGIC)) != DIA_BINARY_MAGIC:
+            raise ValueError(tr("Not a binary .dia file"))
+        
+        # The table of contents is found through the trailer at the end
+        f.seek(size - trailer_size)
+        toc_offset, toc_length = DIA_BINARY_TRAILER.unpack(f.read(DIA_BINARY_TRAILER.size))
+        if f.read(len(DIA_BINARY_MAGIC)) != DIA_BINARY_MAGIC:
+            raise ValueError(tr("Binary .dia file is truncated"))
+        f.seek(toc_offset)
+        toc = json.loads(f.read(toc_length))
+        if toc.get("version") != DIA_BINARY_VERSION:
+            raise ValueError(tr("Unsupported .dia version: {version}").format(version=toc.get('version')))
+        
+        def read_section(name):
+            offset, length, raw_length = toc["sections"][name]
+            f.seek(offset)
+            content = zlib.decompress(f.read(length))
+            if len(content) != raw_length:
+                raise ValueError(tr("Section {name} is damaged").format(name=name))
+            return content
+        
+        settings = json.loads(read_section("Settings"))
+        info = json.loads(read_section("DiaInfo"))
+        custom_colors = json.loads(read_section("CustomColors"))
+        data = DataTable.from_columns(
+            json.loads(read_section("Data/labels")),
+            np.frombuffer(read_section("Data/values"), dtype='<f8'),
+            np.frombuffer(read_section("Data/colors"), dtype='<u4'),
+            json.loads(read_section("Data/palette"))
+        )
+        
+        # Only touch the project once everything was read
+        self.created = settings["created"]
+        self.modified = settings["modified"]
+        for attribute in DIA_INFO_FIELDS.values():
+            if attribute in info:
+                setattr(self, attribute, info[attribute])
+        self.custom_colors.update(custom_colors)
+        self.data = data
+    
+    def from_dia_format(self, dia_content, strict=True):
+        """Load project from .dia format, raises DiaParseError on invalid content
+        
+        With strict=False data rows that cannot be read are left out instead, as older
+        versions did for stored projects; their errors are returned.
+        """
+        skipped = None if strict else []
+        settings = {}
+        custom_colors = {}
+        data = DataTable()
+        sections = [
+            match for match in DIA_SECTION.finditer(dia_content)
+            if not dia_content[dia_content.rfind('\n', 0, match.start()) + 1:match.start()].strip()
+        ]
+        
+        for index, section in enumerate(sections):
+            name = section.group(1)
+            start = section.end()
+            end = sections[index + 1].start() if index + 1 < len(sections) else len(dia_content)
+            
+            if name == "Data":
+                data.extend(*parse_dia_rows(dia_content, start, end, skipped))
+                continue
+            
+            for line in dia_content[start:end].split('\n'):
+                line = line.strip()
+                
+                # Skip comments
+                if not line or line[0] == '#':
+                    continue
+                
+                if name == "Settings":
+                    match = DIA_SETTINGS.match(line)
+                    if match:
+                        settings["created"], settings["modified"] = match.groups()
+                elif name == "DiaInfo":
+                    match = DIA_INFO.match(line)
+                    # The keys are written in the language of the app
+                    if match and original(match.group(1)) in DIA_INFO_FIELDS:
+                        settings[DIA_INFO_FIELDS[original(match.group(1))]] = match.group(2)
+                elif name == "CustomColors":
+                    match = DIA_CUSTOM_COLOR.match(line)
+                    if match:
+                        custom_colors[match.group(1).strip()] = match.group(2).strip()
+        
+        # Only touch the project once everything was read
+        for attribute, value in settings.items():
+            setattr(self, attribute, value)
+        self.custom_colors.update(custom_colors)
+        self.data = data
+        return skipped or []
@@ -0,0 +1,399 @@
+"""Project files on disk: checkpoints, edit journals and the metadata index"""
+import os
+from cryptography.exceptions import InvalidTag
+from datetime import datetime
+import json
+
+from .crypto import EncryptionManager, SegmentReader
+from .files import atomic_write
+from .jobs import JobCancelled, worker_pool, iter_results
+from .texts import tr
+
+def write_project_file(project, file_path, encryption):
+    """Writes a full checkpoint of the project and drops its journal"""
+    atomic_write(file_path, lambda f: encryption.encrypt_to(project.iter_dia_binary(), f, project.summary()))
+    ProjectJournal(file_path, encryption).remove()
+
+def read_project_file(file_path, encryption, progress=None):
+    """Reads a project file of any version, returns None if it cannot be decrypted
+    
+    progress(fraction) is called while a current file is decrypted.
+    """
+    # The model pulls in numpy, which listing projects by their summaries does not need
+    from .model import DiagramProject
+    project = DiagramProject()
+    with open(file_path, 'rb') as f:
+        if encryption.file_version(f) == 2:
+            try:
+                project.from_dia_binary(SegmentReader(encryption, f, progress))
+            except InvalidTag:
+                return None
+            return project
+    
+    dia_content = encryption.decrypt_file(file_path)
+    if dia_content is None:
+        return None
+    # A stored project stays readable if single rows are damaged, like a label with a line break
+    for error in project.from_dia_format(dia_content, strict=False):
+        print(tr("Skipped row in {file}: {error}").format(file=os.path.basename(file_path), error=error))
+    return project
+
+class ProjectJournal:
+    """Append-only log of the edits made since the last full save of a project"""
+    # Number of journaled edits after which a full save is written instead
+    MAX_EDITS = 500
+    
+    def __init__(self, file_path, encryption):
+        self.file_path = self.path_for(file_path)
+        self.encryption = encryption
+    
+    @staticmethod
+    def path_for(file_path):
+        return f"{file_path}.journal"
+    
+    @classmethod
+    def stat(cls, file_path):
+        """os.stat() of the journal of a project file, None if it has none"""
+        try:
+            return os.stat(cls.path_for(file_path))
+        except FileNotFoundError:
+            return None
+    
+    def append(self, base, edits):
+        """Appends edits made on top of the checkpoint identified by base"""
+        lines = [
+            self.encryption.encrypt_data(json.dumps(dict(edit, base=base))) + b"\n"
+            for edit in edits
+        ]
+        with open(self.file_path, 'ab') as f:
+            f.write(b"".join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def replay(self, project):
+        """Applies all journaled edits that belong to the loaded checkpoint"""
+        if not os.path.exists(self.file_path):
+            return 0
+        
+        count = 0
+        with open(self.file_path, 'rb') as f:
+            for line in f:
+                content = self.encryption.decrypt_data(line.strip())
+                # A torn last line means the write was interrupted, stop there
+                if content is None:
+                    break
+                edit = json.loads(content)
+                # Edits of an older checkpoint are already contained in the file
+                if edit.pop("base") != project.modified:
+                    continue
+                project.apply_edit(edit)
+                count += 1
+        project.journal_size = count
+        return count
+    
+    def remove(self):
+        if os.path.exists(self.file_path):
+            os.remove(self.file_path)
+
+class ProjectEntry:
+    """Project metadata shown in the start menu"""
+    def __init__(self, file_name, name="", created="", modified="", chart_type="", row_count=0,
+                 mtime=0, size=0, valid=True, journal_mtime=0, journal_size=0):
+        self.file_name = file_name
+        self.name = name
+        self.created = created
+        self.modified = modified
+        self.chart_type = chart_type
+        self.row_count = row_count
+        self.mtime = mtime
+        self.size = size
+        self.valid = valid
+        # Edits journaled since the last full save change the chart, but not the project file
+        self.journal_mtime = journal_mtime
+        self.journal_size = journal_size
+    
+    @classmethod
+    def from_project(cls, project, file_name, stat, journal_stat=None):
+        return cls.from_summary(project.summary(), file_name, stat, journal_stat)
+    
+    @classmethod
+    def from_summary(cls, summary, file_name, stat, journal_stat=None):
+        if journal_stat is not None:
+            summary = dict(summary, journal_mtime=journal_stat.st_mtime_ns, journal_size=journal_stat.st_size)
+        return cls(file_name, mtime=stat.st_mtime_ns, size=stat.st_size, **summary)
+    
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+    
+    def to_dict(self):
+        return dict(self.__dict__)
+    
+    def matches(self, stat):
+        return self.mtime == stat.st_mtime_ns and self.size == stat.st_size
+
+class ProjectIndex:
+    """Persistent project metadata index, validated by file mtime and size"""
+    VERSION = 1
+    
+    def __init__(self, index_path, projects_dir, encryption):
+        self.index_path = index_path
+        self.projects_dir = projects_dir
+        self.encryption = encryption
+        self.entries = {}
+        self.load()
+    
+    def load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == self.VERSION:
+                self.entries = {
+                    item["file_name"]: ProjectEntry.from_dict(item) for item in data["entries"]
+                }
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(tr("Could not load project index: {error}").format(error=e))
+    
+    def save(self):
+        data = {
+            "version": self.VERSION,
+            "entries": [entry.to_dict() for entry in self.entries.values()]
+        }
+        try:
+            atomic_write(self.index_path, json.dumps(data).encode('utf-8'))
+        except Exception as e:
+            print(tr("Could not save project index: {error}").format(error=e))
+    
+    def refresh(self):
+        """Re-reads only project files that changed since the last scan"""
+        changed = False
+        seen = set()
+        if os.path.exists(self.projects_dir):
+            for file in os.listdir(self.projects_dir):
+                if file.endswith('.dia.tmp'):
+                    # Leftover of an interrupted write, the original file is still intact
+                    os.remove(os.path.join(self.projects_dir, file))
+                    continue
+                if not file.endswith('.dia'):
+                    continue
+                seen.add(file)
+                file_path = os.path.join(self.projects_dir, file)
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+                journal_stat = ProjectJournal.stat(file_path)
+                has_journal = journal_stat is not None
+                entry = self.entries.get(file)
+                if entry is not None and entry.matches(stat) and not has_journal:
+                    continue
+                
+                # Current files carry their metadata in the first segment
+                summary = None if has_journal else self.encryption.read_summary(file_path)
+                if summary is not None:
+                    self.entries[file] = ProjectEntry.from_summary(summary, file, stat)
+                    changed = True
+                    continue
+                
+                project = self.read_project(file_path)
+                if project is not None and has_journal:
+                    stat = self.recover(project, file_path) or stat
+                    journal_stat = ProjectJournal.stat(file_path)
+                if project is not None:
+                    self.entries[file] = ProjectEntry.from_project(project, file, stat, journal_stat)
+                else:
+                    # Remember unreadable files so they are not decrypted again until they change
+                    self.entries[file] = ProjectEntry(file, mtime=stat.st_mtime_ns, size=stat.st_size, valid=False)
+                changed = True
+        
+        for file in list(self.entries):
+            if file not in seen:
+                del self.entries[file]
+                changed = True
+        
+        if changed:
+            self.save()
+        return self.sorted_entries()
+    
+    def sorted_entries(self):
+        entries = [entry for entry in self.entries.values() if entry.valid]
+        entries.sort(key=lambda x: x.modified, reverse=True)
+        return entries
+    
+    def read_project(self, file_path):
+        try:
+            project = read_project_file(file_path, self.encryption)
+            if project is not None:
+                ProjectJournal(file_path, self.encryption).replay(project)
+                return project
+        except Exception as e:
+            print(tr("Error loading {file}: {error}").format(file=os.path.basename(file_path), error=e))
+        return None
+    
+    def recover(self, project, file_path):
+        """Writes a project with replayed journal edits as a new checkpoint"""
+        try:
+            project.modified = datetime.now().isoformat()
+            write_project_file(project, file_path, self.encryption)
+            print(tr("Project recovered from journal: {name}").format(name=project.name))
+            return os.stat(file_path)
+        except Exception as e:
+            print(tr("Could not recover {file}: {error}").format(file=os.path.basename(file_path), error=e))
+            return None
+    
+    def load_project(self, entry):
+        """Loads the full project for an index entry"""
+        return self.read_project(os.path.join(self.projects_dir, entry.file_name))
+    
+    def update(self, project, file_path, save=True):
+        """Updates the entry of a saved project, save=False leaves writing the index to the caller"""
+        file_name = os.path.basename(file_path)
+        entry = ProjectEntry.from_project(project, file_name, os.stat(file_path), ProjectJournal.stat(file_path))
+        self.entries[file_name] = entry
+        if save:
+            self.save()
+        return entry
+    
+    def remove(self, file_name):
+        if self.entries.pop(file_name, None) is not None:
+            self.save()
+
+def find_project_files(paths, recursive=False):
+    """Expands directories to the .dia files they contain, recursive includes subdirectories"""
+    files = []
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append(path)
+        elif recursive:
+            for directory, subdirectories, names in os.walk(path):
+                subdirectories.sort()
+                files.extend(os.path.join(directory, name) for name in sorted(names) if name.endswith('.dia'))
+        else:
+            files.extend(sorted(
+                os.path.join(path, file) for file in os.listdir(path) if file.endswith('.dia')
+            ))
+    return files
+
+# Encryption of a worker process, created for its first file
+_worker_encryption = None
+
+def read_import_file(file_path, replay_journal=False, progress=None):
+    """Reads a project for an import, returns (project, content hash); runs in worker processes"""
+    global _worker_encryption
+    if _worker_encryption is None:
+        _worker_encryption = EncryptionManager()
+    project = read_project_file(file_path, _worker_encryption, progress)
+    if project is None:
+        raise ValueError(tr("The file could not be decrypted"))
+    if replay_journal:
+        ProjectJournal(file_path, _worker_encryption).replay(project)
+    return project, project.content_hash()
+
+def read_import_job(job):
+    """Reads a (file path, replay journal) job, returns (file path, result or error); runs in worker processes"""
+    file_path, replay_journal = job
+    try:
+        return file_path, read_import_file(file_path, replay_journal)
+    except Exception as e:
+        return file_path, e
+
+class ProjectImport:
+    """Imports many project files at once
+    
+    Files are decrypted and parsed in a process pool. Files with the same name and content as
+    another file of the import, or as the existing project of that name, are skipped; projects
+    whose name is taken by a different project get a free name like "Name (2)".
+    """
+    def __init__(self, projects_dir):
+        self.projects_dir = projects_dir
+        # Projects to save, in the order of the files
+        self.projects = []
+        # (file path, name of the project it duplicates)
+        self.duplicates = []
+        # (file path, error)
+        self.failed = []
+    
+    def run(self, file_paths, progress=None, max_workers=None):
+        """Reads the files, progress(fraction) may raise to stop the import"""
+        results = self.read_files([(file_path, False) for file_path in file_paths], progress, max_workers)
+        
+        existing = {}
+        if os.path.exists(self.projects_dir):
+            existing = {
+                file[:-4].lower(): os.path.join(self.projects_dir, file)
+                for file in os.listdir(self.projects_dir) if file.endswith('.dia')
+            }
+        taken = set(existing)
+        seen = {}
+        candidates = []
+        for file_path in file_paths:
+            result = results[file_path]
+            if isinstance(result, Exception):
+                self.failed.append((file_path, result))
+                continue
+            project, content_hash = result
+            # Like existing projects, only projects of the same name can be duplicates
+            key = (project.name.lower(), content_hash)
+            if key in seen:
+                self.duplicates.append((file_path, seen[key]))
+                continue
+            seen[key] = project.name
+            candidates.append((file_path, project, content_hash))
+        
+        # Only existing projects with the same name are read for the comparison
+        clashes = sorted({existing[project.name.lower()] for _, project, _ in candidates
+                          if project.name.lower() in existing})
+        existing_hashes = {}
+        for file_path, result in self.read_files([(path, True) for path in clashes], None, max_workers).items():
+            if not isinstance(result, Exception):
+                existing_hashes[file_path] = result[1]
+        
+        for file_path, project, content_hash in candidates:
+            key = project.name.lower()
+            if key in existing and existing_hashes.get(existing[key]) == content_hash:
+                self.duplicates.append((file_path, project.name))
+                continue
+            project.name = self.free_name(project.name, taken)
+            taken.add(project.name.lower())
+            self.projects.append(project)
+        return self
+    
+    @staticmethod
+    def free_name(name, taken):
+        if name.lower() not in taken:
+            return name
+        number = 2
+        while f"{name} ({number})".lower() in taken:
+            number += 1
+        return f"{name} ({number})"
+    
+    @staticmethod
+    def read_files(jobs, progress, max_workers):
+        """Reads (file path, replay journal) jobs, returns {file path: (project, hash) or the error}"""
+        results = {}
+        if len(jobs) < 2:
+            # Starting worker processes costs more than reading a single file, which reports
+            # its progress while it is decrypted and can be stopped in between
+            for file_path, replay_journal in jobs:
+                try:
+                    results[file_path] = read_import_file(file_path, replay_journal, progress)
+                except JobCancelled:
+                    raise
+                except Exception as e:
+                    results[file_path] = e
+                if progress is not None:
+                    progress(1.0)
+            return results
+        
+        def report():
+            if progress is not None:
+                progress(len(results) / len(jobs))
+        
+        # Leaving the pool terminates its workers, a stopped import does not read on
+        with worker_pool(max_workers or min(len(jobs), os.cpu_count() or 1)) as pool:
+            for file_path, result in iter_results(pool, read_import_job, jobs, report):
+                results[file_path] = result
+                report()
+        return results
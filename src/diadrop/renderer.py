@@ -0,0 +1,473 @@
+"""Matplotlib chart renderers, independent of any window toolkit"""
+from matplotlib.patches import Rectangle
+from matplotlib.ticker import MaxNLocator, FuncFormatter
+import numpy as np
+import math
+import copy
+from collections import OrderedDict
+
+from .model import scheme_colors
+from .aggregation import aggregate_table
+from .texts import tr, original
+
+def bucket_extremes(values, start, stop, buckets):
+    """Returns the sorted indices of the first, last, lowest and highest value in each of
+    buckets equal slices of values[start:stop]
+    
+    With one bucket per pixel column the selected points draw the same line as all of them.
+    """
+    count = stop - start
+    if count <= 4 * buckets:
+        return np.arange(start, stop)
+    size = -(-count // buckets)
+    buckets = -(-count // size)
+    segment = values[start:stop]
+    # The last bucket is padded with its last value, argmin/argmax return the first match
+    padded = np.concatenate([segment, np.repeat(segment[-1:], buckets * size - count)]).reshape(buckets, size)
+    first = np.arange(buckets) * size + start
+    last = np.minimum(first + size - 1, stop - 1)
+    return np.unique(np.concatenate([first, last, first + padded.argmin(axis=1), first + padded.argmax(axis=1)]))
+
+class ChartRenderer:
+    """Keeps the artists of a chart and updates them in place when the data changes"""
+    show_xlabel = True
+    # Bar and pie charts draw large tables aggregated to fewer categories
+    aggregates = False
+    # Up to this many categories every label is shown, more are thinned to fit the axis
+    MAX_CATEGORY_TICKS = 30
+    
+    def __init__(self, figure, chart_type, full_resolution=False, aggregation="top"):
+        self.figure = figure
+        self.chart_type = chart_type
+        self.full_resolution = full_resolution
+        self.aggregation = aggregation
+        # The last aggregated table and the (table, version, mode) it was made for
+        self.aggregated_data = None
+        self.aggregated_key = None
+        # True while some points of the visible range are left out
+        self.decimated = False
+        self.ax = None
+        self.title_artist = None
+        self.labels = []
+        self.values = []
+        self.colors = []
+    
+    def render(self, project):
+        """Draws the project, returns True if the figure had to be rebuilt"""
+        project = self.chart_project(project)
+        if self.ax is None or not project.data or self.title_artist is None or self.needs_rebuild(project):
+            self.build(project)
+            return True
+        
+        self.update(project)
+        self.title_artist.set_text(project.title)
+        self.remember(project)
+        self.figure.tight_layout()
+        self.update_detail()
+        return False
+    
+    def chart_project(self, project):
+        """Returns the project as drawn, with the table aggregated for bar and pie charts"""
+        if not self.aggregates:
+            return project
+        data = project.data
+        key = (data, data.version, self.aggregation)
+        if key != self.aggregated_key:
+            self.aggregated_data = aggregate_table(data, self.aggregation)
+            self.aggregated_key = key
+        if self.aggregated_data is data:
+            return project
+        chart_project = copy.copy(project)
+        chart_project.data = self.aggregated_data
+        return chart_project
+    
+    def build(self, project):
+        self.figure.clear()
+        ax = self.figure.add_subplot(111)
+        self.ax = ax
+        self.title_artist = None
+        
+        self.figure.patch.set_facecolor('#2B2B2B')
+        ax.set_facecolor('#1E1E1E')
+        ax.spines['bottom'].set_color('#666666')
+        ax.spines['top'].set_color('#666666')
+        ax.spines['left'].set_color('#666666')
+        ax.spines['right'].set_color('#666666')
+        ax.tick_params(colors='#CCCCCC', which='both')
+        ax.xaxis.label.set_color('#CCCCCC')
+        ax.yaxis.label.set_color('#CCCCCC')
+        
+        if not project.data:
+            ax.text(0.5, 0.5, tr('No data available\nPlease enter data!'), 
+                   horizontalalignment='center',
+                   verticalalignment='center',
+                   transform=ax.transAxes,
+                   fontsize=16,
+                   color='#888888')
+            return
+        
+        self.create(project)
+        self.title_artist = ax.set_title(project.title, color='#FFFFFF', fontsize=18, weight='bold', pad=20)
+        
+        if self.show_xlabel:
+            ax.set_xlabel(tr('Categories'), color='#CCCCCC', fontsize=12)
+        
+        self.remember(project)
+        self.figure.tight_layout()
+        self.update_detail()
+    
+    def remember(self, project):
+        # The color column is replaced on change, keeping a reference is enough
+        self.labels = list(project.data.labels)
+        self.values = project.data.values.copy()
+        self.colors = project.data.colors
+    
+    def set_category_ticks(self, labels):
+        if len(labels) <= self.MAX_CATEGORY_TICKS:
+            self.ax.set_xticks(range(len(labels)))
+            self.ax.set_xticklabels(labels)
+            return
+        
+        # The locator picks a readable number of categories for the visible range
+        labels = list(labels)
+        def format_tick(x, position):
+            index = int(round(x))
+            return labels[index] if abs(x - index) < 1e-6 and 0 <= index < len(labels) else ""
+        self.ax.xaxis.set_major_locator(MaxNLocator(nbins='auto', integer=True, min_n_ticks=1))
+        self.ax.xaxis.set_major_formatter(FuncFormatter(format_tick))
+    
+    def update_category_ticks(self, labels):
+        if labels != self.labels:
+            self.set_category_ticks(labels)
+    
+    def view(self):
+        """The zoomed x range, None while the whole chart is shown"""
+        if self.ax is None or self.ax.get_autoscalex_on():
+            return None
+        return tuple(self.ax.get_xlim())
+    
+    def set_view(self, view):
+        """Shows an x range returned by view(), None shows the whole chart"""
+        if self.ax is None:
+            return
+        if view is None:
+            self.ax.autoscale(True, axis='x')
+        else:
+            self.ax.set_xlim(view)
+    
+    def needs_rebuild(self, project):
+        """True if drawing the chart again is faster than updating its artists"""
+        return False
+    
+    def create(self, project):
+        raise NotImplementedError
+    
+    def update(self, project):
+        """Updates the existing artists to the current project data"""
+        raise NotImplementedError
+    
+    def zoom(self, x, factor):
+        """Scales the visible x range around x, returns True if the view changed"""
+        return False
+    
+    def update_detail(self):
+        """Chooses the drawn points again for the visible range and canvas size"""
+    
+    def set_full_resolution(self, full_resolution):
+        """Switches between drawing every point and a subset sized to the canvas"""
+        self.full_resolution = full_resolution
+
+class BarRenderer(ChartRenderer):
+    aggregates = True
+    
+    def create(self, project):
+        data = project.data
+        self.bars = list(self.ax.bar(np.arange(len(data)), data.values, 
+                                     color=data.colors, edgecolor='white', linewidth=1.5, alpha=0.9))
+        self.set_category_ticks(data.labels)
+    
+    def needs_rebuild(self, project):
+        # Removing most of many bars one by one is slower than drawing the rest again
+        return len(self.bars) > 1000 and len(self.bars) > 2 * len(project.data)
+    
+    def add_bar(self, x, value, color):
+        bar = Rectangle((x - 0.4, 0), 0.8, value, facecolor=color, edgecolor='white', linewidth=1.5, alpha=0.9)
+        bar.sticky_edges.y.append(0)
+        self.ax.add_patch(bar)
+        return bar
+    
+    def update(self, project):
+        values = project.data.values
+        colors = project.data.colors
+        count = len(values)
+        
+        # Reuse the existing bars, only add or remove the difference
+        for bar in self.bars[count:]:
+            bar.remove()
+        del self.bars[count:]
+        
+        kept = len(self.bars)
+        for i in np.flatnonzero(values[:kept] != self.values[:kept]):
+            self.bars[i].set_height(values[i])
+        if colors is not self.colors:
+            for i in range(kept):
+                if colors[i] != self.colors[i]:
+                    self.bars[i].set_facecolor(colors[i])
+        
+        for i in range(len(self.bars), count):
+            self.bars.append(self.add_bar(i, values[i], colors[i]))
+        
+        self.update_category_ticks(project.data.labels)
+        self.ax.relim()
+        self.ax.autoscale_view()
+
+class SeriesRenderer(ChartRenderer):
+    """Base of charts that draw long series as a subset of points sized to the canvas
+    
+    Each pixel column of the axes keeps its first, last, lowest and highest point. The
+    subset is chosen again when the visible x range changes, full_resolution draws all.
+    """
+    def __init__(self, figure, chart_type, full_resolution=False, aggregation="top"):
+        super().__init__(figure, chart_type, full_resolution, aggregation)
+        self.detail_key = None
+    
+    def create(self, project):
+        self.create_artists(project)
+        self.detail_key = None
+        self.update(project)
+        self.set_category_ticks(project.data.labels)
+        self.ax.set_ylabel(tr('Values'), color='#CCCCCC', fontsize=12)
+        self.ax.grid(True, alpha=0.2, color='#666666')
+        self.ax.callbacks.connect('xlim_changed', lambda ax: self.update_detail())
+    
+    def update(self, project):
+        values = project.data.values
+        self.update_category_ticks(project.data.labels)
+        # Changes of the view below draw from the new data
+        self.remember(project)
+        
+        # A zoomed view stays, otherwise the whole series becomes visible
+        view = None if self.ax.get_autoscalex_on() else self.ax.get_xlim()
+        self.detail_key = None
+        self.draw_detail(values, project.data.colors, view, project)
+        
+        self.ax.relim()
+        # The drawn subset may leave out points of a zoomed view
+        self.ax.update_datalim(self.data_limits(values))
+        self.ax.autoscale_view()
+    
+    def update_detail(self):
+        if self.ax is not None and len(self.values):
+            self.draw_detail(self.values, self.colors, self.ax.get_xlim())
+    
+    def set_full_resolution(self, full_resolution):
+        super().set_full_resolution(full_resolution)
+        self.update_detail()
+    
+    def draw_detail(self, values, colors, view, project=None):
+        count = len(values)
+        start, stop = 0, count
+        if view is not None:
+            # One point beyond each edge keeps lines running to the border
+            start = min(max(math.floor(min(view)) - 1, 0), count)
+            stop = max(min(math.ceil(max(view)) + 2, count), start)
+        buckets = max(int(self.ax.bbox.width), 1)
+        
+        key = (start, stop, buckets, self.full_resolution)
+        if key == self.detail_key:
+            return
+        self.detail_key = key
+        
+        if self.full_resolution:
+            indices = np.arange(start, stop)
+        else:
+            indices = bucket_extremes(values, start, stop, buckets)
+        self.decimated = len(indices) < stop - start
+        self.draw_points(indices, values[indices], [colors[i] for i in indices.tolist()], project)
+    
+    def data_limits(self, values):
+        if not len(values):
+            return [(0, 0)]
+        return [(0, values.min()), (len(values) - 1, values.max())]
+    
+    def zoom(self, x, factor):
+        count = len(self.values)
+        if self.ax is None or x is None or count < 2:
+            return False
+        x0, x1 = self.ax.get_xlim()
+        if (x1 - x0) * factor >= count:
+            if self.ax.get_autoscalex_on():
+                return False
+            # Zoomed out completely, follow the data again
+            self.ax.autoscale(True, axis='x')
+        elif (x1 - x0) * factor >= 2:
+            self.ax.set_xlim(x - (x - x0) * factor, x + (x1 - x) * factor)
+        else:
+            return False
+        return True
+    
+    def create_artists(self, project):
+        raise NotImplementedError
+    
+    def draw_points(self, x, values, colors, project=None):
+        """Shows the points at x; project is given when the data itself changed"""
+        raise NotImplementedError
+
+class LineRenderer(SeriesRenderer):
+    def line_colors(self, project):
+        colors = project.data.colors
+        scheme = scheme_colors(project.color_scheme)
+        return (colors[0] if colors else scheme[0],
+                colors[1] if len(colors) > 1 else scheme[1])
+    
+    def create_artists(self, project):
+        line_color, marker_color = self.line_colors(project)
+        self.line, = self.ax.plot([], [], 
+                                  color=line_color, 
+                                  marker='o', linewidth=3, markersize=10, 
+                                  markerfacecolor=marker_color,
+                                  markeredgecolor='white', markeredgewidth=2)
+        self.fill = None
+    
+    def draw_points(self, x, values, colors, project=None):
+        line_color = self.line.get_color()
+        if project is not None:
+            line_color, marker_color = self.line_colors(project)
+            self.line.set_color(line_color)
+            self.line.set_markerfacecolor(marker_color)
+        
+        self.line.set_data(x, values)
+        # Markers would hide the shape of a thinned out series
+        self.line.set_marker('' if self.decimated else 'o')
+        
+        # The filled area is a single polygon, recreating it is cheaper than patching its path
+        if self.fill is not None:
+            self.fill.remove()
+        self.fill = self.ax.fill_between(x, values, alpha=0.3, color=line_color)
+    
+    def data_limits(self, values):
+        # The filled area always reaches zero
+        return super().data_limits(values) + [(0, 0), (max(len(values) - 1, 0), 0)]
+
+class ScatterRenderer(SeriesRenderer):
+    def create_artists(self, project):
+        self.points = self.ax.scatter([], [], 
+                                      s=300, alpha=0.8, edgecolors='white', linewidth=2)
+    
+    def draw_points(self, x, values, colors, project=None):
+        self.points.set_offsets(np.column_stack([x, values]))
+        self.points.set_facecolor(colors)
+
+class PieRenderer(ChartRenderer):
+    show_xlabel = False
+    aggregates = True
+    # Same geometry as matplotlib's pie() defaults
+    START_ANGLE = 90
+    LABEL_DISTANCE = 1.1
+    PCT_DISTANCE = 0.6
+    
+    def create(self, project):
+        data = project.data
+        self.wedges, self.texts, self.autotexts = self.ax.pie(
+            data.values, 
+            labels=data.labels,
+            autopct='%1.1f%%',
+            colors=data.colors,
+            startangle=self.START_ANGLE,
+            wedgeprops={'edgecolor': 'white', 'linewidth': 2}
+        )
+        for text in self.texts:
+            text.set_color('#CCCCCC')
+        for autotext in self.autotexts:
+            autotext.set_color('white')
+            autotext.set_fontsize(10)
+            autotext.set_weight('bold')
+    
+    def update(self, project):
+        values = project.data.values
+        total = values.sum()
+        if len(values) != len(self.wedges) or total <= 0 or values.min() < 0:
+            # Different number of wedges, let pie() lay them out again
+            for artist in self.wedges + self.texts + self.autotexts:
+                artist.remove()
+            self.create(project)
+            return
+        
+        theta1 = self.START_ANGLE
+        for wedge, text, autotext, label, value, color in zip(
+            self.wedges, self.texts, self.autotexts,
+            project.data.labels, values.tolist(), project.data.colors
+        ):
+            theta2 = theta1 + 360 * value / total
+            middle = math.radians((theta1 + theta2) / 2)
+            wedge.set_theta1(theta1)
+            wedge.set_theta2(theta2)
+            wedge.set_facecolor(color)
+            
+            x, y = math.cos(middle), math.sin(middle)
+            text.set_position((self.LABEL_DISTANCE * x, self.LABEL_DISTANCE * y))
+            text.set_horizontalalignment('left' if x > 0 else 'right')
+            text.set_text(label)
+            autotext.set_position((self.PCT_DISTANCE * x, self.PCT_DISTANCE * y))
+            autotext.set_text('%1.1f%%' % (100 * value / total))
+            theta1 = theta2
+
+class FrameCache:
+    """Rendered frames (Agg buffer regions) by key, least recently used ones are dropped
+    once they take more than max_bytes"""
+    MAX_BYTES = 64 * 1024 * 1024
+    
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.frames = OrderedDict()
+        self.size = 0
+    
+    def __len__(self):
+        return len(self.frames)
+    
+    def get(self, key):
+        """Returns the frame stored for key or None"""
+        entry = self.frames.get(key)
+        if entry is None:
+            return None
+        self.frames.move_to_end(key)
+        return entry[0]
+    
+    def put(self, key, frame):
+        x0, y0, x1, y1 = frame.get_extents()
+        size = (x1 - x0) * (y1 - y0) * 4
+        self.remove(key)
+        if size > self.max_bytes:
+            return
+        self.frames[key] = (frame, size)
+        self.size += size
+        while self.size > self.max_bytes:
+            _, (_, dropped) = self.frames.popitem(last=False)
+            self.size -= dropped
+    
+    def remove(self, key):
+        entry = self.frames.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+# Renderer for each chart type
+CHART_RENDERERS = {
+    "Bar": BarRenderer,
+    "Line": LineRenderer,
+    "Pie": PieRenderer,
+    "Scatter": ScatterRenderer
+}
+
+def create_renderer(figure, chart_type, full_resolution=False, aggregation="top"):
+    """Returns the renderer for a chart type in any language, unknown types are drawn as bar charts
+    
+    Line and scatter charts draw a subset of long series unless full_resolution is set,
+    bar and pie charts aggregate large tables as given by aggregation (see AGGREGATIONS).
+    """
+    renderer_class = CHART_RENDERERS.get(original(chart_type), BarRenderer)
+    return renderer_class(figure, chart_type, full_resolution, aggregation)
+
+def export_figure(figure, file_path, dpi=300, file_format=None):
+    """Saves a rendered chart as an image, the format follows the file extension unless given"""
+    figure.savefig(file_path, dpi=dpi, format=file_format, facecolor='#2B2B2B', 
+                   edgecolor='none', bbox_inches='tight')
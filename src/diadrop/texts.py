@@ -0,0 +1,106 @@
+"""Texts of the core shown to users, in the languages of the apps
+
+The core is written in English. set_language() switches error messages, chart labels,
+project defaults and the keys of the .dia text format to another language; stored names
+(chart types, color schemes, .dia keys) are read in every language.
+"""
+import os
+
+# German text of each English text; texts without an entry stay English
+GERMAN = {
+    # Project defaults, chart types and color schemes
+    "New Project": "Neues Projekt",
+    "My Chart": "Mein Diagramm",
+    "Bar": "Balken",
+    "Line": "Linie",
+    "Pie": "Kreis",
+    "Scatter": "Punkt",
+    "Pastel": "Pastell",
+    "Other": "Sonstige",
+    # .dia text format
+    "Type": "Art",
+    "ColorScheme": "Farbschema",
+    "Title": "Titel",
+    "# .dia File - DiaDrop Chart Format": "# .dia Datei - DiaDrop Diagramm Format",
+    "Line {line}, column {column}: {message}": "Zeile {line}, Spalte {column}: {message}",
+    "Expected [label | value | color]": "Erwartet [Beschriftung | Wert | Farbe]",
+    "Invalid value '{value}'": "Ungültiger Wert '{value}'",
+    # Project files
+    "Columns differ in length": "Spalten sind unterschiedlich lang",
+    "Invalid color code": "Ungültiger Farbcode",
+    "Row out of range": "Zeile außerhalb des Bereichs",
+    "No colors given": "Keine Farben angegeben",
+    "Labels and values differ in length": "Beschriftungen und Werte sind unterschiedlich lang",
+    "Unknown edit: {op}": "Unbekannte Änderung: {op}",
+    "Not a binary .dia file": "Keine binäre .dia Datei",
+    "Binary .dia file is truncated": "Binäre .dia Datei ist abgeschnitten",
+    "Unsupported .dia version: {version}": "Nicht unterstützte .dia Version: {version}",
+    "Section {name} is damaged": "Abschnitt {name} ist beschädigt",
+    "Could not cache key: {error}": "Schlüssel konnte nicht zwischengespeichert werden: {error}",
+    "Unsupported file format": "Nicht unterstütztes Dateiformat",
+    "File is truncated": "Datei ist abgeschnitten",
+    "Not a text project file": "Keine Text-Projektdatei",
+    "Could not load project index: {error}": "Projektindex konnte nicht geladen werden: {error}",
+    "Could not save project index: {error}": "Projektindex konnte nicht gespeichert werden: {error}",
+    "Error loading {file}: {error}": "Fehler beim Laden von {file}: {error}",
+    "Skipped row in {file}: {error}": "Zeile in {file} übersprungen: {error}",
+    "Project recovered from journal: {name}": "Projekt aus dem Journal wiederhergestellt: {name}",
+    "Could not recover {file}: {error}": "{file} konnte nicht wiederhergestellt werden: {error}",
+    "The file could not be decrypted": "Die Datei konnte nicht entschlüsselt werden",
+    # Table import
+    "Missing value": "Fehlender Wert",
+    "Unsupported file type: {extension}": "Nicht unterstützter Dateityp: {extension}",
+    "Reading Excel files needs the openpyxl package":
+        "Zum Lesen von Excel-Dateien wird das Paket openpyxl benötigt",
+    "Reading .xls files needs the xlrd package": "Zum Lesen von .xls-Dateien wird das Paket xlrd benötigt",
+    "Reading Parquet files needs the pyarrow package":
+        "Zum Lesen von Parquet-Dateien wird das Paket pyarrow benötigt",
+    "The table needs at least two columns": "Die Tabelle braucht mindestens zwei Spalten",
+    # Charts
+    "No data available\nPlease enter data!": "Keine Daten vorhanden\nBitte Daten eingeben!",
+    "Categories": "Kategorien",
+    "Values": "Werte",
+    # Rendering without a window
+    "The project has no data": "Das Projekt enthält keine Daten",
+    "Renders .dia projects to images without opening a window.":
+        "Zeichnet .dia Projekte als Bilder, ohne ein Fenster zu öffnen.",
+    ".dia files or directories containing them": ".dia Dateien oder Ordner, die sie enthalten",
+    "output directory (default: next to each project)": "Ausgabeordner (Standard: neben jedem Projekt)",
+    "comma separated image formats: png, svg, pdf (default: png)":
+        "kommagetrennte Bildformate: png, svg, pdf (Standard: png)",
+    "resolution of raster images (default: 300)": "Auflösung von Rasterbildern (Standard: 300)",
+    "how bar and pie charts show large tables (default: top)":
+        "wie Balken- und Kreisdiagramme große Tabellen zeigen (Standard: top)",
+    "number of worker processes": "Anzahl der Arbeitsprozesse",
+    "unsupported format: {formats}": "nicht unterstütztes Format: {formats}",
+    "Rendered {file} -> {image}": "Gezeichnet {file} -> {image}",
+    "Error rendering {file}: {error}": "Fehler beim Zeichnen von {file}: {error}",
+    "{rendered} of {total} projects rendered": "{rendered} von {total} Projekten gezeichnet",
+    "usage: python -m diadrop render [-h] paths [paths ...]":
+        "Verwendung: python -m diadrop render [-h] Pfade [Pfade ...]"
+}
+
+TRANSLATIONS = {
+    "en": {},
+    "de": GERMAN
+}
+
+# English text of every translation, to read names stored by an app in another language
+ORIGINALS = {translated: text for texts in TRANSLATIONS.values() for text, translated in texts.items()}
+
+# Worker processes inherit the language through the environment
+_texts = TRANSLATIONS.get(os.environ.get("DIADROP_LANGUAGE"), TRANSLATIONS["en"])
+
+def set_language(language):
+    """Switches the texts of the core to a language of TRANSLATIONS, also for worker processes"""
+    global _texts
+    _texts = TRANSLATIONS[language]
+    os.environ["DIADROP_LANGUAGE"] = language
+
+def tr(text):
+    """Returns a text in the current language"""
+    return _texts.get(text, text)
+
+def original(text):
+    """Returns the English text of a text in any language"""
+    return ORIGINALS.get(text, text)
@@ -0,0 +1,73 @@
+"""Small chart previews of project files, cached on disk"""
+import os
+import io
+import hashlib
+
+from .files import atomic_write
+from .projects import ProjectJournal, read_project_file
+
+# Charts are 10 x 6 inches, so thumbnails are 160 x 96 pixels
+THUMBNAIL_DPI = 16
+# Part of every thumbnail name, changing it renders all thumbnails again
+THUMBNAIL_VERSION = 1
+
+def thumbnail_name(entry):
+    """File name of the thumbnail of an index entry, it changes with every save and journaled edit"""
+    key = f"{THUMBNAIL_VERSION}|{entry.file_name}|{entry.mtime}|{entry.size}"
+    if entry.journal_mtime:
+        # Thumbnails of projects without journaled edits keep their names
+        key += f"|{entry.journal_mtime}|{entry.journal_size}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest() + ".png"
+
+def render_thumbnail(project, dpi=THUMBNAIL_DPI):
+    """Renders the chart of a project as PNG bytes"""
+    # Only rendering needs matplotlib, listing cached thumbnails does not
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from .renderer import create_renderer
+    
+    # At the thumbnail resolution line charts only keep a few points per pixel
+    figure = Figure(figsize=(project.width, project.height), dpi=dpi, facecolor='#2B2B2B')
+    FigureCanvasAgg(figure)
+    create_renderer(figure, project.chart_type).render(project)
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format='png', dpi=dpi, facecolor='#2B2B2B')
+    return buffer.getvalue()
+
+class ThumbnailCache:
+    """Thumbnails of the projects in projects_dir, stored as PNG files in cache_dir"""
+    def __init__(self, cache_dir, projects_dir, encryption):
+        self.cache_dir = cache_dir
+        self.projects_dir = projects_dir
+        self.encryption = encryption
+    
+    def get(self, entry):
+        """Returns the PNG bytes of an entry's thumbnail, None if the project cannot be read
+        
+        Only projects without a current thumbnail are decrypted and rendered.
+        """
+        path = os.path.join(self.cache_dir, thumbnail_name(entry))
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            pass
+        
+        file_path = os.path.join(self.projects_dir, entry.file_name)
+        project = read_project_file(file_path, self.encryption)
+        if project is None:
+            return None
+        ProjectJournal(file_path, self.encryption).replay(project)
+        data = render_thumbnail(project)
+        atomic_write(path, data)
+        return data
+    
+    def prune(self, entries):
+        """Deletes the thumbnails of projects that changed or no longer exist"""
+        keep = {thumbnail_name(entry) for entry in entries}
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.png') and name not in keep:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
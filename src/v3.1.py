@@ -1,183 +1,287 @@
+import sys
+import multiprocessing
+
+import diadrop
+
+# Texts of the core (errors, chart labels, project defaults) in the language of this app
+diadrop.set_language("en")
+
+# Rendering on a server must not load Tk or pandas, so it is dispatched before the other imports
+# (workers started with spawn import this script again, servers use python -m diadrop render)
+if __name__ == "__main__":
+    # In a frozen Windows executable the export and import workers start through this
+    # script, they have to run their task instead of opening a StartMenu
+    multiprocessing.freeze_support()
+    if sys.argv[1:2] == ["render"]:
+        from diadrop.cli import render_main
+        sys.exit(render_main(sys.argv[2:]))
+
 import customtkinter as ctk
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
+import tkinter as tk
 from tkinter import messagebox, filedialog
-from PIL import Image
-import pandas as pd
 import os
-import base64
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from datetime import datetime
-import re
 import traceback
+import threading
+import queue
+import time
+import io
+from PIL import Image
 
-# Extended color palettes
-COLOR_SCHEMES = {
-    "Modern Blue": ["#0066FF", "#00B4D8", "#90E0EF", "#CAF0F8", "#ADE8F4"],
-    "Sunset": ["#FF6B35", "#F7931E", "#FDC830", "#F37335", "#C44536"],
-    "Forest": ["#2D6A4F", "#40916C", "#52B788", "#74C69D", "#95D5B2"],
-    "Purple Haze": ["#7209B7", "#9D4EDD", "#C77DFF", "#E0AAFF", "#F0D9FF"],
-    "Ocean": ["#03045E", "#023E8A", "#0077B6", "#0096C7", "#00B4D8"],
-    "Neon": ["#FF006E", "#FB5607", "#FFBE0B", "#3A86FF", "#8338EC"],
-    "Pastel": ["#FFADAD", "#FFD6A5", "#FDFFB6", "#CAFFBF", "#9BF6FF"],
-    "Earth": ["#D4A373", "#BC6C25", "#606C38", "#283618", "#FEFAE0"],
-    "Ruby": ["#590D22", "#800F2F", "#A4133C", "#C9184A", "#FF4D6D"],
-    "Ice": ["#012A4A", "#013A63", "#01497C", "#014F86", "#2A6F97"]
+# The start menu must open quickly: numpy and matplotlib are only loaded once a project
+# is opened or a table is imported (diadrop loads its modules on first use)
+from diadrop import (
+    DiaParseError, EncryptionManager, ProjectEntry, ProjectIndex, ProjectJournal, ThumbnailCache,
+    get_app_data_dir, thumbnail_name, write_project_file
+)
+
+# Sort options for the project list: (key, descending)
+PROJECT_SORT_OPTIONS = {
+    "Last modified": (lambda p: p.modified, True),
+    "Name": (lambda p: p.name.lower(), False),
+    "Created": (lambda p: p.created, True),
+    "Data points": (lambda p: p.row_count, True)
+}
+
+# How bar and pie charts show tables with too many rows (see diadrop.AGGREGATIONS)
+AGGREGATION_OPTIONS = {
+    "Top 25 + Other": "top",
+    "Sum equal labels": "group",
+    "Count per value range": "bins",
+    "Every row": "off"
 }
 
-class DiagramProject:
-    def __init__(self, name="New Project"):
-        self.name = name
-        self.created = datetime.now().isoformat()
-        self.modified = datetime.now().isoformat()
-        self.data = {"labels": [], "values": [], "colors": []}
-        self.chart_type = "Bar"
-        self.color_scheme = "Modern Blue"
-        self.title = "My Chart"
-        # Fixed diagram size (no longer changeable)
-        self.width = 10
-        self.height = 6
-        self.custom_colors = {}
-    
-    def to_dia_format(self):
-        """Convert project to .dia format"""
-        dia_content = ["[<TYPE dia>]", ""]
-        
-        # Settings Section
-        dia_content.append("[__Settings__]")
-        dia_content.append(f"[Project Settings: created=\"{self.created}\" modified=\"{self.modified}\"]")
-        dia_content.append("")
-        
-        # Data Section
-        dia_content.append("[__Data__]")
-        for label, value, color in zip(self.data["labels"], self.data["values"], self.data["colors"]):
-            dia_content.append(f"[{label} | {value} | {color}]")
-        dia_content.append("")
-        
-        # DiaInfo Section
-        dia_content.append("[__DiaInfo__]")
-        dia_content.append(f"[Name: \"{self.name}\"]")
-        dia_content.append(f"[Type: \"{self.chart_type}\"]")
-        dia_content.append(f"[ColorScheme: \"{self.color_scheme}\"]")
-        dia_content.append(f"[Title: \"{self.title}\"]")
-        # Size no longer included in format since it's fixed
-        dia_content.append("")
-        
-        # Custom Colors
-        if self.custom_colors:
-            dia_content.append("[__CustomColors__]")
-            for key, color in self.custom_colors.items():
-                dia_content.append(f"[{key}: {color}]")
-            dia_content.append("")
-        
-        dia_content.append("# .dia File - DiaDrop Chart Format")
-        
-        return "\n".join(dia_content)
-    
-    def from_dia_format(self, dia_content):
-        """Load project from .dia format"""
+# File types offered when a new project imports a table
+TABLE_FILE_TYPES = [
+    ("Tables", "*.xlsx *.xlsm *.xls *.csv *.tsv *.txt *.parquet"),
+    ("Excel files", "*.xlsx *.xlsm *.xls"),
+    ("CSV/TSV files", "*.csv *.tsv *.txt"),
+    ("Parquet files", "*.parquet")
+]
+
+class ProjectWriter:
+    """Runs project file writes in order on a background thread"""
+    def __init__(self, widget, encryption):
+        self.widget = widget
+        self.encryption = encryption
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.lock = threading.Lock()
+        self.latest = {}
+        # Callbacks of superseded writes, they run once the newer write of their file is done
+        self.waiting = {}
+        self.sequence = 0
+        self.pending = 0
+        self.poll_id = None
+        self.thread = threading.Thread(target=self.run, name="ProjectWriter", daemon=True)
+        self.thread.start()
+    
+    def submit(self, snapshot, file_path, callback):
+        """Queues a full save of a snapshot, callback(error) runs on the UI thread"""
+        self.put(lambda: write_project_file(snapshot, file_path, self.encryption), callback, file_path)
+    
+    def append_journal(self, file_path, base, edits, callback):
+        journal = ProjectJournal(file_path, self.encryption)
+        self.put(lambda: journal.append(base, edits), callback)
+    
+    def remove(self, *file_paths):
+        def remove_files():
+            for file_path in file_paths:
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+        self.put(remove_files, None)
+    
+    def put(self, work, callback, file_path=None):
+        with self.lock:
+            self.sequence += 1
+            if file_path is not None:
+                self.latest[file_path] = self.sequence
+            self.pending += 1
+            job = (self.sequence, file_path, work, callback)
+        self.jobs.put(job)
+        if self.poll_id is None:
+            self.poll_id = self.widget.after(50, self.poll)
+    
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            try:
+                if job is None:
+                    return
+                sequence, file_path, work, callback = job
+                with self.lock:
+                    superseded = file_path is not None and self.latest[file_path] > sequence
+                # A newer snapshot of the same file is queued, never write an older one after it
+                if superseded:
+                    if callback is not None:
+                        self.waiting.setdefault(file_path, []).append(callback)
+                else:
+                    try:
+                        work()
+                        error = None
+                    except Exception as e:
+                        error = e
+                    for waiting in self.waiting.pop(file_path, []):
+                        self.results.put((waiting, error))
+                    if callback is not None:
+                        self.results.put((callback, error))
+                    elif error is not None:
+                        print(f"Background write failed: {error}")
+                with self.lock:
+                    self.pending -= 1
+            finally:
+                self.jobs.task_done()
+    
+    def poll(self):
+        self.poll_id = None
+        self.process_results()
+        with self.lock:
+            busy = self.pending > 0
+        if busy:
+            self.poll_id = self.widget.after(50, self.poll)
+    
+    def process_results(self):
+        while True:
+            try:
+                callback, error = self.results.get_nowait()
+            except queue.Empty:
+                return
+            callback(error)
+    
+    def flush(self):
+        """Waits until all queued writes are done"""
+        self.jobs.join()
+        self.process_results()
+    
+    def close(self):
+        self.flush()
+        self.jobs.put(None)
+        self.thread.join()
+
+class BackgroundJob:
+    """Runs an import or export on a background thread, progress and result are handled on the UI thread"""
+    def __init__(self, widget, work, on_progress, on_done):
+        self.widget = widget
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.updates = queue.Queue()
+        self.cancelled = threading.Event()
+        self.thread = threading.Thread(target=self.run, args=(work,), name="BackgroundJob", daemon=True)
+        self.thread.start()
+        self.widget.after(50, self.poll)
+    
+    def progress(self, fraction):
+        """Passed to the work function, stops it once the job was cancelled"""
+        if self.cancelled.is_set():
+            raise diadrop.JobCancelled()
+        self.updates.put(("progress", fraction))
+    
+    def cancel(self):
+        self.cancelled.set()
+    
+    def run(self, work):
         try:
-            lines = dia_content.split('\n')
-            current_section = None
-            
-            for line in lines:
-                line = line.strip()
-                
-                # Skip comments
-                if line.startswith('#') or not line:
-                    continue
-                
-                # Detect section headers
-                if line.startswith('[') and line.endswith(']'):
-                    content = line[1:-1]
-                    
-                    if content == '<TYPE dia>':
-                        continue  # Header, ignore
-                    elif content.startswith('__') and content.endswith('__'):
-                        current_section = content
-                        continue
-                
-                # Process data according to section
-                if current_section == "__Settings__":
-                    if "Project Settings:" in line:
-                        # Extract Created and Modified
-                        match = re.search(r'created="([^"]+)" modified="([^"]+)"', line)
-                        if match:
-                            self.created = match.group(1)
-                            self.modified = match.group(2)
-                
-                elif current_section == "__Data__":
-                    if line.startswith('[') and line.endswith(']'):
-                        data_line = line[1:-1]
-                        parts = [part.strip() for part in data_line.split('|')]
-                        if len(parts) == 3:
-                            self.data["labels"].append(parts[0])
-                            self.data["values"].append(float(parts[1]))
-                            self.data["colors"].append(parts[2])
-                
-                elif current_section == "__DiaInfo__":
-                    if line.startswith('[') and line.endswith(']'):
-                        info_line = line[1:-1]
-                        if "Name:" in info_line:
-                            match = re.search(r'Name:\s*"([^"]+)"', info_line)
-                            if match:
-                                self.name = match.group(1)
-                        elif "Type:" in info_line:
-                            match = re.search(r'Type:\s*"([^"]+)"', info_line)
-                            if match:
-                                self.chart_type = match.group(1)
-                        elif "ColorScheme:" in info_line:
-                            match = re.search(r'ColorScheme:\s*"([^"]+)"', info_line)
-                            if match:
-                                self.color_scheme = match.group(1)
-                        elif "Title:" in info_line:
-                            match = re.search(r'Title:\s*"([^"]+)"', info_line)
-                            if match:
-                                self.title = match.group(1)
-                        # Size no longer loaded since it's fixed
-                
-                elif current_section == "__CustomColors__":
-                    if line.startswith('[') and line.endswith(']'):
-                        color_line = line[1:-1]
-                        if ':' in color_line:
-                            key, color = color_line.split(':', 1)
-                            self.custom_colors[key.strip()] = color.strip()
-            
-            return True
+            self.updates.put(("done", work(self.progress), None))
         except Exception as e:
-            print(f"Error parsing .dia file: {e}")
-            return False
+            self.updates.put(("done", None, e))
+    
+    def poll(self):
+        fraction = None
+        while True:
+            try:
+                update = self.updates.get_nowait()
+            except queue.Empty:
+                break
+            if update[0] == "done":
+                _, result, error = update
+                # The work may have finished before it noticed the cancellation
+                if self.cancelled.is_set() and error is None:
+                    result, error = None, diadrop.JobCancelled()
+                self.on_done(result, error)
+                return
+            fraction = update[1]
+        
+        # Only the latest progress is shown
+        if fraction is not None:
+            self.on_progress(fraction)
+        self.widget.after(50, self.poll)
 
-class EncryptionManager:
-    def __init__(self):
-        self.key = self._generate_key()
-    
-    def _generate_key(self):
-        password = b"dia_drop_secret_key_2024"
-        salt = b"dia_drop_salt_2024"
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-        )
-        return base64.urlsafe_b64encode(kdf.derive(password))
+class ThumbnailLoader:
+    """Loads project thumbnails on a background thread, the most recently requested first"""
+    SIZE = (160, 96)
+    # Thumbnails kept as images, more are dropped oldest first
+    MAX_IMAGES = 500
     
-    def encrypt_data(self, data):
-        fernet = Fernet(self.key)
-        encrypted_data = fernet.encrypt(data.encode())
-        return encrypted_data
+    def __init__(self, widget, cache):
+        self.widget = widget
+        self.cache = cache
+        self.requests = queue.LifoQueue()
+        self.results = queue.Queue()
+        self.images = {}
+        # Thumbnail name -> callback of the card waiting for it
+        self.callbacks = {}
+        self.pending = set()
+        self.placeholder = ctk.CTkImage(Image.new("RGB", self.SIZE, "#2B2B2B"), size=self.SIZE)
+        self.poll_id = None
+        self.thread = None
     
-    def decrypt_data(self, encrypted_data):
-        fernet = Fernet(self.key)
-        try:
-            decrypted_data = fernet.decrypt(encrypted_data)
-            return decrypted_data.decode()
-        except Exception:
-            return None
+    def start(self, entries):
+        """Starts loading, thumbnails of projects not among entries are deleted first"""
+        self.thread = threading.Thread(target=self.run, args=(entries,), name="ThumbnailLoader", daemon=True)
+        self.thread.start()
+    
+    def request(self, entry, callback):
+        """Calls callback(image) on the UI thread, right away if the thumbnail is loaded"""
+        name = thumbnail_name(entry)
+        if name in self.images:
+            callback(self.images[name] or self.placeholder)
+            return
+        callback(self.placeholder)
+        self.callbacks[name] = callback
+        if name not in self.pending:
+            self.pending.add(name)
+            self.requests.put((name, entry))
+        if self.poll_id is None:
+            self.poll_id = self.widget.after(50, self.poll)
+    
+    def run(self, entries):
+        self.cache.prune(entries)
+        while True:
+            job = self.requests.get()
+            if job is None:
+                return
+            name, entry = job
+            try:
+                data = self.cache.get(entry)
+                image = Image.open(io.BytesIO(data)) if data is not None else None
+                if image is not None:
+                    image.load()
+            except Exception as e:
+                print(f"Could not create thumbnail of {entry.name}: {e}")
+                image = None
+            self.results.put((name, image))
+    
+    def poll(self):
+        self.poll_id = None
+        while True:
+            try:
+                name, image = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.pending.discard(name)
+            if len(self.images) >= self.MAX_IMAGES:
+                del self.images[next(iter(self.images))]
+            # Unreadable projects are remembered as None and keep the placeholder
+            self.images[name] = ctk.CTkImage(image, size=self.SIZE) if image is not None else None
+            callback = self.callbacks.pop(name, None)
+            if callback is not None:
+                callback(self.images[name] or self.placeholder)
+        if self.pending:
+            self.poll_id = self.widget.after(50, self.poll)
+    
+    def close(self):
+        if self.thread is not None:
+            self.requests.put(None)
 
 class RenameDialog(ctk.CTkToplevel):
     def __init__(self, parent, current_name):
@@ -236,6 +340,204 @@ class RenameDialog(ctk.CTkToplevel):
     def cancel(self):
         self.destroy()
 
+class VirtualListView(ctk.CTkFrame):
+    """Scrollable list that only creates cards for the visible rows and reuses them"""
+    def __init__(self, master, create_card, row_height):
+        super().__init__(master)
+        self.create_card = create_card
+        self.row_height = row_height
+        self.items = []
+        self.visible_cards = {}
+        self.free_cards = []
+        self.windows = {}
+        
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+        
+        self.canvas = tk.Canvas(
+            self,
+            highlightthickness=0,
+            borderwidth=0,
+            bg=self._apply_appearance_mode(self._fg_color),
+            yscrollincrement=max(row_height // 2, 1)
+        )
+        self.canvas.grid(row=0, column=0, sticky="nsew", padx=(10, 0), pady=10)
+        
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.canvas.yview)
+        self.scrollbar.grid(row=0, column=1, sticky="ns", padx=5, pady=10)
+        self.canvas.configure(yscrollcommand=self.on_scroll)
+        
+        self.empty_text = ""
+        self.empty_label = ctk.CTkLabel(self, text="", text_color="#888888")
+        
+        self.canvas.bind("<Configure>", self.on_resize)
+        self.bind_all("<MouseWheel>", self.on_mousewheel, add="+")
+        self.bind_all("<Button-4>", self.on_mousewheel, add="+")
+        self.bind_all("<Button-5>", self.on_mousewheel, add="+")
+    
+    def set_items(self, items, empty_text=None):
+        """Shows a new sequence of items (any object with len() and indexing)"""
+        self.items = items
+        if empty_text is not None:
+            self.empty_text = empty_text
+        self.refresh()
+    
+    def refresh(self, from_row=0):
+        """Updates the list after rows were inserted or removed at from_row"""
+        self.canvas.configure(scrollregion=(0, 0, 0, len(self.items) * self.row_height))
+        if len(self.items) == 0:
+            self.canvas.yview_moveto(0)
+            self.empty_label.configure(text=self.empty_text)
+            self.empty_label.place(relx=0.5, y=30, anchor="n")
+        else:
+            self.empty_label.place_forget()
+        self.render(rebind_from=from_row)
+    
+    def refresh_row(self, row):
+        """Updates the card of a single row if it is visible"""
+        card = self.visible_cards.get(row)
+        if card is not None:
+            card.show(row, self.items[row])
+    
+    def see(self, row):
+        total = len(self.items)
+        if total and 0 <= row < total:
+            top = self.canvas.canvasy(0)
+            bottom = top + self.canvas.winfo_height()
+            y = row * self.row_height
+            if y < top or y + self.row_height > bottom:
+                self.canvas.yview_moveto(max(y + self.row_height - (bottom - top), 0) / (total * self.row_height))
+    
+    def render(self, rebind_from=None):
+        height = self.canvas.winfo_height()
+        top = self.canvas.canvasy(0)
+        first = max(0, int(top // self.row_height))
+        last = min(len(self.items), int((top + height) // self.row_height) + 1)
+        
+        # Release cards that scrolled out of view
+        for row in list(self.visible_cards):
+            if not first <= row < last:
+                card = self.visible_cards.pop(row)
+                self.canvas.itemconfigure(self.windows[card], state="hidden")
+                self.free_cards.append(card)
+        
+        for row in range(first, last):
+            card = self.visible_cards.get(row)
+            if card is None:
+                card = self.free_cards.pop() if self.free_cards else self.add_card()
+                self.visible_cards[row] = card
+                self.canvas.coords(self.windows[card], 0, row * self.row_height)
+                self.canvas.itemconfigure(self.windows[card], state="normal")
+                card.show(row, self.items[row])
+            elif rebind_from is not None and row >= rebind_from:
+                card.show(row, self.items[row])
+    
+    def add_card(self):
+        card = self.create_card(self.canvas)
+        self.windows[card] = self.canvas.create_window(
+            0, 0,
+            window=card,
+            anchor="nw",
+            width=max(self.canvas.winfo_width() - 10, 1),
+            height=self.row_height - 4
+        )
+        return card
+    
+    def on_resize(self, event):
+        for window in self.windows.values():
+            self.canvas.itemconfigure(window, width=max(event.width - 10, 1))
+        self.render()
+    
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.render()
+    
+    def on_mousewheel(self, event):
+        if not str(event.widget).startswith(str(self.canvas)):
+            return
+        if event.num == 4:
+            step = -1
+        elif event.num == 5:
+            step = 1
+        else:
+            step = -int(event.delta / 120) or (-1 if event.delta > 0 else 1)
+        self.canvas.yview_scroll(step, "units")
+
+class ProjectCard(ctk.CTkFrame):
+    """Project card that is reused for other projects while scrolling"""
+    def __init__(self, master, start_menu):
+        super().__init__(master)
+        self.entry = None
+        self.thumbnails = start_menu.thumbnails
+        
+        self.thumbnail_label = ctk.CTkLabel(self, text="", image=self.thumbnails.placeholder)
+        self.thumbnail_label.pack(side="left", padx=(10, 0), pady=10)
+        
+        # Project Info
+        info_frame = ctk.CTkFrame(self, fg_color="transparent")
+        info_frame.pack(side="left", fill="both", expand=True, padx=15, pady=10)
+        
+        self.name_label = ctk.CTkLabel(
+            info_frame,
+            text="",
+            font=ctk.CTkFont(size=18, weight="bold")
+        )
+        self.name_label.pack(anchor="w")
+        
+        self.created_label = ctk.CTkLabel(info_frame, text="", text_color="#888888")
+        self.created_label.pack(anchor="w")
+        
+        self.modified_label = ctk.CTkLabel(info_frame, text="", text_color="#888888")
+        self.modified_label.pack(anchor="w")
+        
+        # Button Frame
+        btn_frame = ctk.CTkFrame(self, fg_color="transparent")
+        btn_frame.pack(side="right", padx=10, pady=10)
+        
+        open_btn = ctk.CTkButton(
+            btn_frame,
+            text="Open",
+            command=lambda: start_menu.open_project(self.entry),
+            width=80
+        )
+        open_btn.pack(pady=2)
+        
+        rename_btn = ctk.CTkButton(
+            btn_frame,
+            text="Rename",
+            command=lambda: start_menu.rename_project(self.entry),
+            width=80,
+            fg_color="#FFB74D",
+            hover_color="#FF9800"
+        )
+        rename_btn.pack(pady=2)
+        
+        delete_btn = ctk.CTkButton(
+            btn_frame,
+            text="Delete",
+            command=lambda: start_menu.delete_project(self.entry),
+            width=80,
+            fg_color="#E57373",
+            hover_color="#EF5350"
+        )
+        delete_btn.pack(pady=2)
+    
+    def show(self, row, entry):
+        self.entry = entry
+        self.name_label.configure(text=entry.name)
+        self.created_label.configure(
+            text=f"Created: {datetime.fromisoformat(entry.created).strftime('%m/%d/%Y %H:%M')}"
+        )
+        self.modified_label.configure(
+            text=f"Modified: {datetime.fromisoformat(entry.modified).strftime('%m/%d/%Y %H:%M')}"
+        )
+        self.thumbnails.request(entry, lambda image: self.show_thumbnail(entry, image))
+    
+    def show_thumbnail(self, entry, image):
+        # The card may show another project by the time the thumbnail is loaded
+        if entry is self.entry:
+            self.thumbnail_label.configure(image=image)
+
 class StartMenu(ctk.CTk):
     def __init__(self):
         super().__init__()
@@ -254,7 +556,19 @@ class StartMenu(ctk.CTk):
         
         self.setup_directories()
         self.encryption = EncryptionManager()
+        self.writer = ProjectWriter(self, self.encryption)
+        self.index = ProjectIndex(
+            os.path.join(self.cache_dir, 'project_index.json'),
+            self.projects_dir,
+            self.encryption
+        )
         self.projects = self.load_projects()
+        self.thumbnails = ThumbnailLoader(
+            self,
+            ThumbnailCache(self.thumbnails_dir, self.projects_dir, self.encryption)
+        )
+        # Rendered chart frames, created by the first chart window
+        self.frame_cache = None
         
         # Fullscreen status
         self.is_fullscreen = False
@@ -268,34 +582,21 @@ class StartMenu(ctk.CTk):
         # Handle close event
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
         
+        # Thumbnails load once the window is shown, so rendering does not delay the start
+        self.after(200, lambda: self.thumbnails.start(self.projects))
+        
     def setup_directories(self):
-        self.app_data_dir = os.path.join(os.getenv('APPDATA'), 'DiaDrop')
+        self.app_data_dir = get_app_data_dir()
         self.projects_dir = os.path.join(self.app_data_dir, 'projects')
+        self.cache_dir = os.path.join(self.app_data_dir, 'cache')
+        self.thumbnails_dir = os.path.join(self.cache_dir, 'thumbnails')
         
-        for directory in [self.app_data_dir, self.projects_dir]:
+        for directory in [self.app_data_dir, self.projects_dir, self.cache_dir, self.thumbnails_dir]:
             if not os.path.exists(directory):
                 os.makedirs(directory)
     
     def load_projects(self):
-        projects = []
-        if os.path.exists(self.projects_dir):
-            for file in os.listdir(self.projects_dir):
-                if file.endswith('.dia'):
-                    file_path = os.path.join(self.projects_dir, file)
-                    try:
-                        with open(file_path, 'rb') as f:
-                            encrypted_data = f.read()
-                        
-                        dia_content = self.encryption.decrypt_data(encrypted_data)
-                        if dia_content:
-                            project = DiagramProject()
-                            if project.from_dia_format(dia_content):
-                                projects.append(project)
-                    except Exception as e:
-                        print(f"Error loading {file}: {e}")
-        
-        projects.sort(key=lambda x: x.modified, reverse=True)
-        return projects
+        return self.index.refresh()
     
     def create_ui(self):
         self.grid_columnconfigure(0, weight=1)
@@ -316,164 +617,284 @@ class StartMenu(ctk.CTk):
         button_frame = ctk.CTkFrame(header_frame)
         button_frame.pack(pady=10)
         
-        new_project_btn = ctk.CTkButton(
+        self.new_project_btn = ctk.CTkButton(
             button_frame,
             text="➕ New Project",
             command=self.new_project,
             height=40,
             width=200
         )
-        new_project_btn.pack(side="left", padx=10)
+        self.new_project_btn.pack(side="left", padx=10)
         
-        import_project_btn = ctk.CTkButton(
+        self.import_project_btn = ctk.CTkButton(
             button_frame,
             text="📁 Import Project",
             command=self.import_project,
             height=40,
             width=200
         )
-        import_project_btn.pack(side="left", padx=10)
-        
-        # Projects List
-        self.projects_frame = ctk.CTkScrollableFrame(self)
-        self.projects_frame.grid(row=1, column=0, padx=20, pady=10, sticky="nsew")
+        self.import_project_btn.pack(side="left", padx=10)
         
-        self.refresh_projects_list()
-    
-    def refresh_projects_list(self):
-        for widget in self.projects_frame.winfo_children():
-            widget.destroy()
-        
-        if not self.projects:
-            empty_label = ctk.CTkLabel(
-                self.projects_frame,
-                text="No projects available.\nCreate a new project!",
-                font=ctk.CTkFont(size=16),
-                text_color="#888888"
-            )
-            empty_label.pack(pady=50)
-            return
-        
-        for i, project in enumerate(self.projects):
-            project_card = self.create_project_card(project, i)
-            project_card.pack(fill="x", padx=10, pady=5)
-    
-    def create_project_card(self, project, index):
-        card = ctk.CTkFrame(self.projects_frame, height=80)
+        self.import_folder_btn = ctk.CTkButton(
+            button_frame,
+            text="📂 Import Folder",
+            command=self.import_folder,
+            height=40,
+            width=200
+        )
+        self.import_folder_btn.pack(side="left", padx=10)
         
-        # Project Info
-        info_frame = ctk.CTkFrame(card, fg_color="transparent")
-        info_frame.pack(side="left", fill="both", expand=True, padx=15, pady=10)
+        # Search and sort
+        filter_frame = ctk.CTkFrame(header_frame, fg_color="transparent")
+        filter_frame.pack(pady=(0, 10))
         
-        name_label = ctk.CTkLabel(
-            info_frame,
-            text=project.name,
-            font=ctk.CTkFont(size=18, weight="bold")
+        self.search_entry = ctk.CTkEntry(
+            filter_frame,
+            placeholder_text="🔍 Search projects...",
+            width=300
         )
-        name_label.pack(anchor="w")
+        self.search_entry.pack(side="left", padx=10)
+        self.search_entry.bind("<KeyRelease>", lambda e: self.refresh_projects_list())
         
-        created_label = ctk.CTkLabel(
-            info_frame,
-            text=f"Created: {datetime.fromisoformat(project.created).strftime('%m/%d/%Y %H:%M')}",
-            text_color="#888888"
+        self.sort_menu = ctk.CTkOptionMenu(
+            filter_frame,
+            values=list(PROJECT_SORT_OPTIONS.keys()),
+            command=lambda choice: self.refresh_projects_list(),
+            width=200
         )
-        created_label.pack(anchor="w")
+        self.sort_menu.pack(side="left", padx=10)
+        
+        # Progress of the running import, only shown while one runs
+        self.import_job = None
+        self.import_frame = ctk.CTkFrame(header_frame, fg_color="transparent")
+        self.import_label = ctk.CTkLabel(self.import_frame, text="")
+        self.import_label.pack(side="left", padx=10)
+        self.import_progress = ctk.CTkProgressBar(self.import_frame, width=300)
+        self.import_progress.pack(side="left", padx=10)
+        ctk.CTkButton(
+            self.import_frame,
+            text="Cancel",
+            command=self.cancel_import,
+            width=100,
+            fg_color="#E57373",
+            hover_color="#EF5350"
+        ).pack(side="left", padx=10)
         
-        modified_label = ctk.CTkLabel(
-            info_frame,
-            text=f"Modified: {datetime.fromisoformat(project.modified).strftime('%m/%d/%Y %H:%M')}",
-            text_color="#888888"
+        # Projects List
+        self.projects_frame = VirtualListView(
+            self,
+            lambda master: ProjectCard(master, self),
+            row_height=130
         )
-        modified_label.pack(anchor="w")
+        self.projects_frame.empty_label.configure(font=ctk.CTkFont(size=16))
+        self.projects_frame.grid(row=1, column=0, padx=20, pady=10, sticky="nsew")
         
-        # Button Frame
-        btn_frame = ctk.CTkFrame(card, fg_color="transparent")
-        btn_frame.pack(side="right", padx=10, pady=10)
+        self.refresh_projects_list()
+    
+    def refresh_projects_list(self):
+        """Applies search and sort to the index and rebinds the visible cards"""
+        query = self.search_entry.get().strip().lower()
+        sort_key, reverse = PROJECT_SORT_OPTIONS[self.sort_menu.get()]
         
-        open_btn = ctk.CTkButton(
-            btn_frame,
-            text="Open",
-            command=lambda p=project: self.open_project(p),
-            width=80
-        )
-        open_btn.pack(pady=2)
+        entries = [p for p in self.projects if query in p.name.lower()] if query else list(self.projects)
+        entries.sort(key=sort_key, reverse=reverse)
         
-        rename_btn = ctk.CTkButton(
-            btn_frame,
-            text="Rename",
-            command=lambda p=project: self.rename_project(p),
-            width=80,
-            fg_color="#FFB74D",
-            hover_color="#FF9800"
-        )
-        rename_btn.pack(pady=2)
+        if not self.projects:
+            empty_text = "No projects available.\nCreate a new project!"
+        else:
+            empty_text = "No projects match your search."
+        self.projects_frame.set_items(entries, empty_text)
+    
+    def refresh_project_card(self, entry):
+        """Replaces one entry in the list and updates its card in place"""
+        for i, p in enumerate(self.projects):
+            if p.file_name == entry.file_name:
+                self.projects[i] = entry
+                break
+        else:
+            self.projects.insert(0, entry)
+            self.insert_project_card(entry)
+            return
         
-        delete_btn = ctk.CTkButton(
-            btn_frame,
-            text="Delete",
-            command=lambda p=project: self.delete_project(p),
-            width=80,
-            fg_color="#E57373",
-            hover_color="#EF5350"
-        )
-        delete_btn.pack(pady=2)
+        view = self.projects_frame.items
+        for row, current in enumerate(view):
+            if current.file_name == entry.file_name:
+                view[row] = entry
+                self.projects_frame.refresh_row(row)
+                break
+    
+    def insert_project_card(self, entry):
+        """Adds a new entry at its sorted position without rebuilding the list"""
+        query = self.search_entry.get().strip().lower()
+        if query and query not in entry.name.lower():
+            return
         
-        return card
+        sort_key, reverse = PROJECT_SORT_OPTIONS[self.sort_menu.get()]
+        key = sort_key(entry)
+        view = self.projects_frame.items
+        row = 0
+        while row < len(view) and (sort_key(view[row]) >= key if reverse else sort_key(view[row]) <= key):
+            row += 1
+        view.insert(row, entry)
+        self.projects_frame.refresh(from_row=row)
     
     def new_project(self):
         dialog = NewProjectDialog(self)
         self.wait_window(dialog)
         
         if dialog.result:
-            project_name, import_excel = dialog.result
-            project = DiagramProject(project_name)
+            project_name, import_table = dialog.result
+            project = diadrop.DiagramProject(project_name)
             
-            if import_excel:
-                file_path = filedialog.askopenfilename(
-                    filetypes=[("Excel files", "*.xlsx *.xls")]
-                )
-                if file_path:
-                    try:
-                        df = pd.read_excel(file_path)
-                        if len(df.columns) >= 2:
-                            project.data["labels"] = df.iloc[:, 0].astype(str).tolist()
-                            project.data["values"] = df.iloc[:, 1].astype(float).tolist()
-                            colors = COLOR_SCHEMES[project.color_scheme]
-                            project.data["colors"] = [colors[i % len(colors)] for i in range(len(project.data["labels"]))]
-                    except Exception as e:
-                        messagebox.showerror("Error", f"Could not import Excel file: {str(e)}")
-            
-            self.save_project(project)
-            self.projects.insert(0, project)
-            self.refresh_projects_list()
-            self.open_project(project)
+            file_path = None
+            if import_table:
+                file_path = filedialog.askopenfilename(filetypes=TABLE_FILE_TYPES)
+            if file_path:
+                self.import_table(project, file_path)
+            else:
+                self.create_project(project)
+    
+    def create_project(self, project):
+        # The card is added once the writer has saved the project
+        self.save_project(project)
+        self.open_project(project)
+    
+    def start_import(self, text, work, on_done):
+        """Runs work(progress) as the import job and shows its progress until on_done(result, error)"""
+        def finish(result, error):
+            self.import_job = None
+            self.import_frame.pack_forget()
+            for button in (self.new_project_btn, self.import_project_btn, self.import_folder_btn):
+                button.configure(state="normal")
+            if not isinstance(error, diadrop.JobCancelled):
+                on_done(result, error)
+        
+        for button in (self.new_project_btn, self.import_project_btn, self.import_folder_btn):
+            button.configure(state="disabled")
+        self.import_label.configure(text=text)
+        self.import_progress.set(0)
+        self.import_frame.pack(pady=(0, 10))
+        self.import_job = BackgroundJob(self, work, self.import_progress.set, finish)
+    
+    def cancel_import(self):
+        if self.import_job is not None:
+            self.import_job.cancel()
+            self.import_label.configure(text="Cancelling...")
+    
+    def import_table(self, project, file_path):
+        """Reads a table in the background and creates the project when it is done"""
+        colors = diadrop.scheme_colors(project.color_scheme)
+        self.start_import(
+            f"Importing {os.path.basename(file_path)}...",
+            lambda progress: diadrop.read_table(file_path, colors, progress),
+            lambda result, error: self.on_table_imported(project, result, error)
+        )
+    
+    def on_table_imported(self, project, result, error):
+        if error is not None:
+            messagebox.showerror("Error", f"Could not import file: {str(error)}")
+        else:
+            table, reader = result
+            project.data = table
+            if reader.skipped_count:
+                self.show_skipped_rows(reader)
+            if reader.ambiguous_count:
+                self.show_ambiguous_rows(reader)
+        self.create_project(project)
+    
+    def show_skipped_rows(self, reader):
+        lines = [f"Row {row}: {reason}" for row, reason in reader.skipped[:10]]
+        if reader.skipped_count > len(lines):
+            lines.append(f"... and {reader.skipped_count - len(lines)} more")
+        messagebox.showwarning(
+            "Import",
+            f"{reader.row_count} rows imported, {reader.skipped_count} rows skipped:\n\n" + "\n".join(lines)
+        )
+    
+    def show_ambiguous_rows(self, reader):
+        rows = ", ".join(map(str, reader.ambiguous[:10]))
+        if reader.ambiguous_count > 10:
+            rows += ", ..."
+        messagebox.showwarning(
+            "Import",
+            f"{reader.ambiguous_count} values like 1,000 could be decimals or thousands and were "
+            f"read as thousands, please check rows {rows}."
+        )
     
     def import_project(self):
-        file_path = filedialog.askopenfilename(
+        file_paths = filedialog.askopenfilenames(
             filetypes=[("DiaDrop Projects", "*.dia")]
         )
         
-        if file_path:
-            try:
-                with open(file_path, 'rb') as f:
-                    encrypted_data = f.read()
-                
-                dia_content = self.encryption.decrypt_data(encrypted_data)
-                if dia_content:
-                    project = DiagramProject()
-                    if project.from_dia_format(dia_content):
-                        self.save_project(project)
-                        self.projects.insert(0, project)
-                        self.refresh_projects_list()
-                        messagebox.showinfo("Success", f"Project '{project.name}' successfully imported!")
-                    else:
-                        messagebox.showerror("Error", "The .dia file could not be read!")
-                else:
-                    messagebox.showerror("Error", "The file could not be decrypted!")
-            except Exception as e:
-                messagebox.showerror("Error", f"Project could not be imported: {str(e)}")
+        if file_paths:
+            self.import_project_files(list(file_paths))
+    
+    def import_folder(self):
+        folder = filedialog.askdirectory(title="Import Folder")
+        if not folder:
+            return
+        
+        file_paths = diadrop.find_project_files([folder], recursive=True)
+        if file_paths:
+            self.import_project_files(file_paths)
+        else:
+            messagebox.showinfo("Import", "The folder does not contain any .dia files.")
+    
+    def import_project_files(self, file_paths):
+        """Reads the files in worker processes and saves the new projects in one batch"""
+        # Pending saves must be on disk before the import compares names and contents
+        self.writer.flush()
+        project_import = diadrop.ProjectImport(self.projects_dir)
+        if len(file_paths) == 1:
+            text = f"Importing {os.path.basename(file_paths[0])}..."
+        else:
+            text = f"Importing {len(file_paths)} projects..."
+        self.start_import(
+            text,
+            lambda progress: project_import.run(file_paths, progress),
+            self.on_projects_imported
+        )
+    
+    def on_projects_imported(self, project_import, error):
+        if error is not None:
+            messagebox.showerror("Error", f"Projects could not be imported: {str(error)}")
+            return
+        
+        saved = []
+        for project in project_import.projects:
+            self.save_project(project, on_saved=lambda name=project.name: saved.append(name), refresh=False)
+        # The writer runs jobs in order, so this callback comes after all saves
+        self.writer.put(lambda: None, lambda error: self.finish_project_import(project_import, saved))
+    
+    def finish_project_import(self, project_import, saved):
+        """Writes the index and refreshes the list once for the whole import"""
+        self.index.save()
+        self.projects = self.index.sorted_entries()
+        self.refresh_projects_list()
+        
+        if len(saved) == 1 and not project_import.duplicates and not project_import.failed:
+            messagebox.showinfo("Success", f"Project '{saved[0]}' successfully imported!")
+            return
+        
+        lines = [f"{len(saved)} projects imported."]
+        if project_import.duplicates:
+            lines.append(f"\n{len(project_import.duplicates)} skipped, already present:")
+            lines.extend(f"{os.path.basename(file_path)} ({name})" for file_path, name in project_import.duplicates[:10])
+        if project_import.failed:
+            lines.append(f"\n{len(project_import.failed)} could not be imported:")
+            lines.extend(f"{os.path.basename(file_path)}: {error}" for file_path, error in project_import.failed[:10])
+        show = messagebox.showwarning if project_import.failed else messagebox.showinfo
+        show("Import", "\n".join(lines))
     
     def open_project(self, project):
+        # Index entries only hold metadata, load the full project on demand
+        if isinstance(project, ProjectEntry):
+            self.writer.flush()
+            project = self.index.load_project(project)
+            if project is None:
+                messagebox.showerror("Error", "The .dia file could not be read!")
+                return
+        
         self.withdraw()
         app = DiagramCreator(project, self)
         
@@ -486,14 +907,28 @@ class StartMenu(ctk.CTk):
         
         if dialog.result:
             new_name = dialog.result
-            # Delete old file
-            old_file_path = os.path.join(self.projects_dir, f"{project.name}.dia")
-            if os.path.exists(old_file_path):
-                os.remove(old_file_path)
+            entry = project
+            self.writer.flush()
+            project = self.index.load_project(entry)
+            if project is None:
+                messagebox.showerror("Error", "The .dia file could not be read!")
+                return
+            
+            old_file_path = os.path.join(self.projects_dir, entry.file_name)
+            self.index.remove(entry.file_name)
+            self.projects = [p for p in self.projects if p.file_name != entry.file_name]
             
             project.name = new_name.strip()
             project.modified = datetime.now().isoformat()
-            self.save_project(project)
+            new_file_path = os.path.join(self.projects_dir, f"{project.name}.dia")
+            if os.path.normcase(new_file_path) == os.path.normcase(old_file_path):
+                self.save_project(project)
+            else:
+                # Delete old file only once the renamed project is safely written
+                self.save_project(
+                    project,
+                    on_saved=lambda: self.writer.remove(old_file_path, ProjectJournal.path_for(old_file_path))
+                )
             self.refresh_projects_list()
     
     def delete_project(self, project):
@@ -503,15 +938,19 @@ class StartMenu(ctk.CTk):
         )
         
         if result:
+            self.writer.flush()
+            
             # Remove from list
-            self.projects = [p for p in self.projects if p.name != project.name]
+            self.projects = [p for p in self.projects if p.file_name != project.file_name]
+            self.index.remove(project.file_name)
             
             # Delete file
-            file_name = f"{project.name}.dia"
+            file_name = project.file_name
             file_path = os.path.join(self.projects_dir, file_name)
             if os.path.exists(file_path):
                 try:
                     os.remove(file_path)
+                    ProjectJournal(file_path, self.encryption).remove()
                     print(f"Project file deleted: {file_path}")
                 except Exception as e:
                     messagebox.showerror("Error", f"File could not be deleted: {str(e)}")
@@ -520,25 +959,73 @@ class StartMenu(ctk.CTk):
             
             self.refresh_projects_list()
     
-    def save_project(self, project):
+    def save_project(self, project, full=True, on_saved=None, refresh=True):
+        """Saves a full checkpoint, or with full=False only journals the edits since the last save
+        
+        refresh=False leaves writing the index and updating the list to the caller.
+        """
         try:
-            project.modified = datetime.now().isoformat()
             file_path = os.path.join(self.projects_dir, f"{project.name}.dia")
-            dia_content = project.to_dia_format()
-            encrypted_data = self.encryption.encrypt_data(dia_content)
+            edits = project.take_edits()
             
-            with open(file_path, 'wb') as f:
-                f.write(encrypted_data)
-            print(f"Project saved: {project.name}")
+            if (not full and edits is not None
+                    and project.journal_size + len(edits) <= ProjectJournal.MAX_EDITS):
+                if edits:
+                    self.writer.append_journal(
+                        file_path,
+                        project.modified,
+                        edits,
+                        lambda error: self.on_journal_saved(project, file_path, error)
+                    )
+                    project.journal_size += len(edits)
+            else:
+                project.modified = datetime.now().isoformat()
+                snapshot = project.snapshot()
+                
+                # Encryption and disk I/O happen on the writer thread
+                self.writer.submit(
+                    snapshot,
+                    file_path,
+                    lambda error: self.on_project_saved(project, snapshot, file_path, error, on_saved, refresh)
+                )
+                project.journal_size = 0
+            
+            project.saved_revision = project.revision
             return True
         except Exception as e:
             print(f"Error saving project: {e}")
             messagebox.showerror("Error", f"Project could not be saved: {str(e)}")
             return False
     
+    def on_project_saved(self, project, snapshot, file_path, error, on_saved=None, refresh=True):
+        if error is not None:
+            # Keep the project dirty so the next save retries
+            project.mark_dirty()
+            print(f"Error saving project: {error}")
+            messagebox.showerror("Error", f"Project could not be saved: {str(error)}")
+            return
+        
+        entry = self.index.update(snapshot, file_path, save=refresh)
+        if refresh:
+            self.refresh_project_card(entry)
+        print(f"Project saved: {snapshot.name}")
+        if on_saved is not None:
+            on_saved()
+    
+    def on_journal_saved(self, project, file_path, error):
+        if error is not None:
+            # The journal may be incomplete, the next save writes a full checkpoint
+            project.mark_dirty()
+            print(f"Error saving project: {error}")
+            return
+        
+        # The grown journal gives the card a new thumbnail, the index is written with the next save
+        self.refresh_project_card(self.index.update(project, file_path, save=False))
+    
     def show_menu(self):
         self.deiconify()
         # Reload projects to ensure list is current
+        self.writer.flush()
         self.projects = self.load_projects()
         self.refresh_projects_list()
     
@@ -554,6 +1041,10 @@ class StartMenu(ctk.CTk):
     
     def on_closing(self):
         # When closing the start menu, exit the program
+        if self.import_job is not None:
+            self.import_job.cancel()
+        self.thumbnails.close()
+        self.writer.close()
         self.destroy()
 
 class NewProjectDialog(ctk.CTkToplevel):
@@ -578,13 +1069,13 @@ class NewProjectDialog(ctk.CTkToplevel):
         self.name_entry.pack(pady=5)
         self.name_entry.insert(0, "New Project")
         
-        self.excel_var = ctk.BooleanVar()
-        excel_check = ctk.CTkCheckBox(
+        self.table_var = ctk.BooleanVar()
+        table_check = ctk.CTkCheckBox(
             self, 
-            text="Import Excel file", 
-            variable=self.excel_var
+            text="Import table (Excel, CSV, Parquet)", 
+            variable=self.table_var
         )
-        excel_check.pack(pady=10)
+        table_check.pack(pady=10)
         
         btn_frame = ctk.CTkFrame(self)
         btn_frame.pack(pady=20)
@@ -615,17 +1106,144 @@ class NewProjectDialog(ctk.CTkToplevel):
     def create(self):
         name = self.name_entry.get().strip()
         if name:
-            self.result = (name, self.excel_var.get())
+            self.result = (name, self.table_var.get())
             self.destroy()
     
     def cancel(self):
         self.destroy()
 
+class DataRowModel:
+    """Row based access to the project data"""
+    def __init__(self, project):
+        self.project = project
+    
+    def __len__(self):
+        return len(self.project.data)
+    
+    def __getitem__(self, row):
+        return self.project.data.row(row)
+    
+
+class DataRowCard(ctk.CTkFrame):
+    """Data row that is reused for other rows while scrolling"""
+    def __init__(self, master, creator):
+        super().__init__(master, height=40)
+        self.row = None
+        
+        self.color_button = ctk.CTkButton(
+            self,
+            text="",
+            width=30,
+            height=30,
+            command=lambda: creator.change_data_color(self.row)
+        )
+        self.color_button.pack(side="left", padx=5, pady=5)
+        
+        text_frame = ctk.CTkFrame(self, fg_color="transparent")
+        text_frame.pack(side="left", fill="x", expand=True, padx=5, pady=5)
+        
+        self.text_label = ctk.CTkLabel(text_frame, text="", anchor="w")
+        self.text_label.pack(fill="x")
+        
+        delete_btn = ctk.CTkButton(
+            self,
+            text="🗑️",
+            width=30,
+            height=30,
+            fg_color="transparent",
+            hover_color="#E63946",
+            text_color="#E63946",
+            command=lambda: creator.delete_data(self.row)
+        )
+        delete_btn.pack(side="right", padx=5, pady=5)
+    
+    def show(self, row, item):
+        label, value, color = item
+        self.row = row
+        self.color_button.configure(fg_color=color, hover_color=color)
+        self.text_label.configure(text=f"{label}: {value}")
+
+class SaveScheduler:
+    """Coalesces edits into at most one save per quiet interval"""
+    def __init__(self, widget, project, save, delay=1500, max_delay=10000):
+        self.widget = widget
+        self.project = project
+        self.save = save
+        self.delay = delay
+        self.max_delay = max_delay
+        self.after_id = None
+        self.pending_since = None
+    
+    def schedule(self):
+        now = time.monotonic()
+        if self.after_id is not None:
+            # Keep postponing while edits continue, but not forever
+            if (now - self.pending_since) * 1000 >= self.max_delay:
+                return
+            self.widget.after_cancel(self.after_id)
+        else:
+            self.pending_since = now
+        self.after_id = self.widget.after(self.delay, self.flush)
+    
+    def cancel(self):
+        if self.after_id is not None:
+            try:
+                self.widget.after_cancel(self.after_id)
+            except Exception:
+                pass
+        self.after_id = None
+        self.pending_since = None
+    
+    def flush(self):
+        """Saves the project now if it has unsaved changes"""
+        self.cancel()
+        if not self.project.is_dirty:
+            return True
+        return self.save()
+
+class RenderScheduler:
+    """Coalesces bursts of chart change events into a single redraw"""
+    def __init__(self, widget, render, update_title, delay=40):
+        self.widget = widget
+        self.render = render
+        self.update_title = update_title
+        self.delay = delay
+        self.after_id = None
+        self.full = False
+        self.title = False
+    
+    def request(self, title_only=False):
+        if title_only:
+            self.title = True
+        else:
+            self.full = True
+        if self.after_id is None:
+            self.after_id = self.widget.after(self.delay, self.run)
+    
+    def cancel(self):
+        if self.after_id is not None:
+            try:
+                self.widget.after_cancel(self.after_id)
+            except Exception:
+                pass
+        self.after_id = None
+    
+    def run(self):
+        self.after_id = None
+        full, title = self.full, self.title
+        self.full = self.title = False
+        # A full redraw already contains the new title
+        if full:
+            self.render()
+        elif title:
+            self.update_title()
+
 class DiagramCreator(ctk.CTk):
     def __init__(self, project, start_menu):
         super().__init__()
         
         self.project = project
+        self.rows = DataRowModel(project)
         self.start_menu = start_menu
         self.encryption = EncryptionManager()
         
@@ -645,19 +1263,34 @@ class DiagramCreator(ctk.CTk):
         ctk.set_default_color_theme("blue")
         
         self.auto_save_id = None
+        self.save_scheduler = SaveScheduler(self, project, self.save_project)
+        self.render_scheduler = RenderScheduler(self, self.update_chart, self.update_chart_title)
+        self.renderer = None
+        self.title_artist = None
+        self.title_background = None
+        # Frames are shared by all chart windows, so reopening an unchanged project draws from them
+        if start_menu.frame_cache is None:
+            start_menu.frame_cache = diadrop.FrameCache()
+        self.frame_cache = start_menu.frame_cache
+        # True while the canvas shows a cached frame instead of the figure
+        self.figure_stale = False
+        # The .dia code is only generated when its tab is shown, edits mark it outdated
+        self.dia_code_stale = True
+        # The first chart is drawn once the canvas is mapped and has its real size
+        self.chart_pending = True
+        # Frame cache key of the next canvas draw after a resize
+        self.frame_pending = None
         self.setup_auto_save()
         
         self.create_ui()
         
         self.bind('<F11>', self.toggle_fullscreen)
         self.bind('<Escape>', self.exit_fullscreen)
-        self.bind('<Control-s>', lambda e: self.save_project())
+        self.bind('<Control-s>', lambda e: self.save_project(full=True))
         
         # Handle close event
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
         
-        self.update_chart()
-        
     def setup_auto_save(self):
         # Auto-save with error handling
         try:
@@ -668,7 +1301,7 @@ class DiagramCreator(ctk.CTk):
     def auto_save(self):
         try:
             if self.winfo_exists():  # Check if window still exists
-                self.save_project()
+                self.save_scheduler.flush()
                 # Schedule next auto-save
                 self.auto_save_id = self.after(30000, self.auto_save)
         except Exception as e:
@@ -678,10 +1311,13 @@ class DiagramCreator(ctk.CTk):
                 self.auto_save_id = self.after(30000, self.auto_save)
     
     def create_ui(self):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        
         self.grid_columnconfigure(1, weight=1)
         self.grid_rowconfigure(0, weight=1)
         
-        self.sidebar = ctk.CTkTabview(self, width=400)
+        self.sidebar = ctk.CTkTabview(self, width=400, command=self.on_tab_changed)
         self.sidebar.grid(row=0, column=0, sticky="nsew", padx=0, pady=0)
         
         self.sidebar.add("Data")
@@ -701,6 +1337,9 @@ class DiagramCreator(ctk.CTk):
         self.figure = Figure(figsize=(10, 6), facecolor='#2B2B2B')
         self.canvas = FigureCanvasTkAgg(self.figure, master=self.chart_container)
         self.canvas.get_tk_widget().grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
+        self.canvas.mpl_connect('resize_event', self.on_canvas_resize)
+        self.canvas.mpl_connect('draw_event', self.on_canvas_draw)
+        self.canvas.mpl_connect('scroll_event', self.zoom_chart)
         
     def setup_data_tab(self):
         tab = self.sidebar.tab("Data")
@@ -740,8 +1379,12 @@ class DiagramCreator(ctk.CTk):
             font=ctk.CTkFont(weight="bold")
         ).pack(padx=10, pady=(10, 5), anchor="w")
         
-        self.data_scrollable = ctk.CTkScrollableFrame(list_frame, height=200)
-        self.data_scrollable.pack(fill="both", expand=True, padx=10, pady=5)
+        self.data_list = VirtualListView(
+            list_frame,
+            lambda master: DataRowCard(master, self),
+            row_height=44
+        )
+        self.data_list.pack(fill="both", expand=True, padx=10, pady=5)
         
         self.clear_button = ctk.CTkButton(
             list_frame, 
@@ -769,7 +1412,7 @@ class DiagramCreator(ctk.CTk):
         self.chart_type = ctk.CTkSegmentedButton(
             type_frame,
             values=["Bar", "Line", "Pie", "Scatter"],
-            command=self.update_chart
+            command=lambda value: self.request_render()
         )
         self.chart_type.set(self.project.chart_type)
         self.chart_type.pack(fill="x", padx=10, pady=5)
@@ -785,12 +1428,29 @@ class DiagramCreator(ctk.CTk):
         
         self.color_scheme = ctk.CTkOptionMenu(
             color_frame,
-            values=list(COLOR_SCHEMES.keys()),
+            values=[diadrop.tr(name) for name in diadrop.COLOR_SCHEMES],
             command=self.change_color_scheme
         )
         self.color_scheme.set(self.project.color_scheme)
         self.color_scheme.pack(fill="x", padx=10, pady=5)
         
+        aggregation_frame = ctk.CTkFrame(tab)
+        aggregation_frame.pack(fill="x", padx=10, pady=10)
+        
+        ctk.CTkLabel(
+            aggregation_frame, 
+            text="Large Bar/Pie Charts:", 
+            font=ctk.CTkFont(weight="bold")
+        ).pack(padx=10, pady=(10, 5), anchor="w")
+        
+        self.aggregation_menu = ctk.CTkOptionMenu(
+            aggregation_frame,
+            values=list(AGGREGATION_OPTIONS.keys()),
+            command=lambda value: self.request_render()
+        )
+        self.aggregation_menu.set(next(iter(AGGREGATION_OPTIONS)))
+        self.aggregation_menu.pack(fill="x", padx=10, pady=5)
+        
         # Size settings removed (no longer changeable)
         
         title_frame = ctk.CTkFrame(tab)
@@ -808,7 +1468,7 @@ class DiagramCreator(ctk.CTk):
         )
         self.chart_title_entry.pack(fill="x", padx=10, pady=5)
         self.chart_title_entry.insert(0, self.project.title)
-        self.chart_title_entry.bind("<KeyRelease>", lambda e: self.update_chart())
+        self.chart_title_entry.bind("<KeyRelease>", lambda e: self.render_scheduler.request(title_only=True))
         
         # Add export button
         export_frame = ctk.CTkFrame(tab)
@@ -820,6 +1480,25 @@ class DiagramCreator(ctk.CTk):
             font=ctk.CTkFont(weight="bold")
         ).pack(padx=10, pady=(10, 5), anchor="w")
         
+        format_frame = ctk.CTkFrame(export_frame, fg_color="transparent")
+        format_frame.pack(fill="x", padx=10, pady=5)
+        self.export_formats = {}
+        for file_format in diadrop.EXPORT_FORMATS:
+            self.export_formats[file_format] = ctk.BooleanVar(value=file_format == "png")
+            ctk.CTkCheckBox(
+                format_frame,
+                text=file_format.upper(),
+                variable=self.export_formats[file_format],
+                width=70
+            ).pack(side="left")
+        
+        self.export_dpi_entry = ctk.CTkEntry(
+            export_frame, 
+            placeholder_text="Resolution in dpi, e.g. 150, 300"
+        )
+        self.export_dpi_entry.pack(fill="x", padx=10, pady=5)
+        self.export_dpi_entry.insert(0, "300")
+        
         self.export_button = ctk.CTkButton(
             export_frame,
             text="📷 Save as Image",
@@ -829,6 +1508,22 @@ class DiagramCreator(ctk.CTk):
             hover_color="#7B1FA2"
         )
         self.export_button.pack(fill="x", padx=10, pady=5)
+        
+        # Progress of the running export, only shown while one runs
+        self.export_job = None
+        self.export_status = ctk.CTkFrame(export_frame, fg_color="transparent")
+        self.export_label = ctk.CTkLabel(self.export_status, text="", anchor="w")
+        self.export_label.pack(fill="x")
+        self.export_progress = ctk.CTkProgressBar(self.export_status)
+        self.export_progress.pack(side="left", fill="x", expand=True)
+        ctk.CTkButton(
+            self.export_status,
+            text="Cancel",
+            command=self.cancel_export,
+            width=80,
+            fg_color="#E57373",
+            hover_color="#EF5350"
+        ).pack(side="left", padx=(10, 0))
     
     def setup_dia_code_tab(self):
         tab = self.sidebar.tab("Dia Code")
@@ -850,8 +1545,6 @@ class DiagramCreator(ctk.CTk):
         self.dia_code_text = ctk.CTkTextbox(tab, font=ctk.CTkFont(family="Courier", size=12))
         self.dia_code_text.pack(fill="both", expand=True, padx=10, pady=5)
         
-        self.update_dia_code_display()
-        
         btn_frame = ctk.CTkFrame(tab, fg_color="transparent")
         btn_frame.pack(fill="x", padx=10, pady=10)
         
@@ -870,61 +1563,7 @@ class DiagramCreator(ctk.CTk):
         ).pack(side="left", padx=5)
     
     def update_data_display(self):
-        for widget in self.data_scrollable.winfo_children():
-            widget.destroy()
-        
-        if not self.project.data["labels"]:
-            empty_label = ctk.CTkLabel(
-                self.data_scrollable,
-                text="No data available",
-                text_color="#888888"
-            )
-            empty_label.pack(pady=20)
-            return
-        
-        for i, (label, value, color) in enumerate(zip(
-            self.project.data["labels"], 
-            self.project.data["values"],
-            self.project.data["colors"]
-        )):
-            self.create_data_row(i, label, value, color)
-    
-    def create_data_row(self, index, label, value, color):
-        row_frame = ctk.CTkFrame(self.data_scrollable, height=40)
-        row_frame.pack(fill="x", pady=2)
-        row_frame.pack_propagate(False)
-        
-        color_button = ctk.CTkButton(
-            row_frame,
-            text="",
-            width=30,
-            height=30,
-            fg_color=color,
-            hover_color=color,
-            command=lambda idx=index: self.change_data_color(idx)
-        )
-        color_button.pack(side="left", padx=5, pady=5)
-        
-        text_frame = ctk.CTkFrame(row_frame, fg_color="transparent")
-        text_frame.pack(side="left", fill="x", expand=True, padx=5, pady=5)
-        
-        ctk.CTkLabel(
-            text_frame,
-            text=f"{label}: {value}",
-            anchor="w"
-        ).pack(fill="x")
-        
-        delete_btn = ctk.CTkButton(
-            row_frame,
-            text="🗑️",
-            width=30,
-            height=30,
-            fg_color="transparent",
-            hover_color="#E63946",
-            text_color="#E63946",
-            command=lambda idx=index: self.delete_data(idx)
-        )
-        delete_btn.pack(side="right", padx=5, pady=5)
+        self.data_list.set_items(self.rows, "No data available")
     
     def add_data(self):
         label = self.label_entry.get().strip()
@@ -940,208 +1579,315 @@ class DiagramCreator(ctk.CTk):
             messagebox.showerror("Error", "Value must be a number!")
             return
         
-        colors = COLOR_SCHEMES[self.project.color_scheme]
-        color = colors[len(self.project.data["labels"]) % len(colors)]
+        colors = diadrop.scheme_colors(self.project.color_scheme)
+        color = colors[len(self.rows) % len(colors)]
         
-        self.project.data["labels"].append(label)
-        self.project.data["values"].append(value)
-        self.project.data["colors"].append(color)
+        self.apply_edit({"op": "add", "label": label, "value": value, "color": color})
+        row = len(self.rows) - 1
         
-        self.update_data_display()
+        self.data_list.refresh(from_row=row)
+        self.data_list.see(row)
         self.label_entry.delete(0, 'end')
         self.value_entry.delete(0, 'end')
-        self.update_chart()
-        self.update_dia_code_display()
-        self.save_project()
+        self.request_render()
     
     def delete_data(self, index):
-        if 0 <= index < len(self.project.data["labels"]):
-            self.project.data["labels"].pop(index)
-            self.project.data["values"].pop(index)
-            self.project.data["colors"].pop(index)
+        if 0 <= index < len(self.rows):
+            self.apply_edit({"op": "remove", "row": index})
             
-            self.update_data_display()
-            self.update_chart()
-            self.update_dia_code_display()
-            self.save_project()
+            self.data_list.refresh(from_row=index)
+            self.request_render()
     
     def change_data_color(self, index):
         color = ctk.filedialog.askcolor(
             title="Choose color",
-            initialcolor=self.project.data["colors"][index]
+            initialcolor=self.project.data.colors[index]
         )
         
         if color[1]:
-            self.project.data["colors"][index] = color[1]
-            self.update_data_display()
-            self.update_chart()
-            self.save_project()
+            self.apply_edit({"op": "color", "row": index, "color": color[1]})
+            self.data_list.refresh_row(index)
+            self.request_render()
     
     def clear_data(self):
-        self.project.data = {"labels": [], "values": [], "colors": []}
-        self.update_data_display()
-        self.update_chart()
-        self.update_dia_code_display()
-        self.save_project()
+        self.apply_edit({"op": "clear"})
+        self.data_list.refresh()
+        self.request_render()
     
     def change_color_scheme(self, choice):
-        self.project.color_scheme = choice
-        colors = COLOR_SCHEMES[choice]
-        self.project.data["colors"] = [colors[i % len(colors)] for i in range(len(self.project.data["labels"]))]
-        self.update_data_display()
-        self.update_chart()
-        self.save_project()
+        self.apply_edit({"op": "scheme", "scheme": choice})
+        self.data_list.refresh()
+        self.request_render()
+    
+    def request_render(self):
+        self.render_scheduler.request()
     
     def update_chart(self, *args):
         try:
-            self.figure.clear()
-            ax = self.figure.add_subplot(111)
+            self.render_scheduler.cancel()
             
-            self.project.chart_type = self.chart_type.get()
-            self.project.title = self.chart_title_entry.get() or "My Chart"
+            chart_type = self.chart_type.get()
+            title = self.chart_title_entry.get() or "My Chart"
+            if chart_type != self.project.chart_type or title != self.project.title:
+                self.apply_edit({"op": "settings", "chart_type": chart_type, "title": title})
             
-            self.figure.patch.set_facecolor('#2B2B2B')
-            ax.set_facecolor('#1E1E1E')
-            ax.spines['bottom'].set_color('#666666')
-            ax.spines['top'].set_color('#666666')
-            ax.spines['left'].set_color('#666666')
-            ax.spines['right'].set_color('#666666')
-            ax.tick_params(colors='#CCCCCC', which='both')
-            ax.xaxis.label.set_color('#CCCCCC')
-            ax.yaxis.label.set_color('#CCCCCC')
-            
-            if not self.project.data["labels"] or not self.project.data["values"]:
-                ax.text(0.5, 0.5, 'No data available\nPlease enter data!', 
-                       horizontalalignment='center',
-                       verticalalignment='center',
-                       transform=ax.transAxes,
-                       fontsize=16,
-                       color='#888888')
-                self.canvas.draw()
+            # A chart drawn before with the same content is shown from the frame cache
+            key = self.frame_key()
+            frame = self.frame_cache.get(key) if key is not None else None
+            if frame is not None:
+                self.canvas.restore_region(frame)
+                self.canvas.blit(self.figure.bbox)
+                self.figure_stale = True
                 return
             
-            colors = self.project.data["colors"]
-            chart_type = self.project.chart_type
-            
-            if chart_type == "Bar":
-                bars = ax.bar(self.project.data["labels"], self.project.data["values"], 
-                             color=colors, edgecolor='white', linewidth=1.5, alpha=0.9)
-                
-            elif chart_type == "Line":
-                line = ax.plot(self.project.data["labels"], self.project.data["values"], 
-                       color=colors[0] if colors else COLOR_SCHEMES[self.project.color_scheme][0], 
-                       marker='o', linewidth=3, markersize=10, 
-                       markerfacecolor=colors[1] if len(colors) > 1 else COLOR_SCHEMES[self.project.color_scheme][1],
-                       markeredgecolor='white', markeredgewidth=2)
-                ax.fill_between(range(len(self.project.data["labels"])), 
-                               self.project.data["values"], alpha=0.3, color=colors[0] if colors else COLOR_SCHEMES[self.project.color_scheme][0])
-                ax.set_ylabel('Values', color='#CCCCCC', fontsize=12)
-                ax.grid(True, alpha=0.2, color='#666666')
-                
-            elif chart_type == "Pie":
-                wedges, texts, autotexts = ax.pie(
-                    self.project.data["values"], 
-                    labels=self.project.data["labels"],
-                    autopct='%1.1f%%',
-                    colors=colors,
-                    startangle=90,
-                    wedgeprops={'edgecolor': 'white', 'linewidth': 2}
-                )
-                for text in texts:
-                    text.set_color('#CCCCCC')
-                for autotext in autotexts:
-                    autotext.set_color('white')
-                    autotext.set_fontsize(10)
-                    autotext.set_weight('bold')
-                
-            elif chart_type == "Scatter":
-                scatter = ax.scatter(range(len(self.project.data["labels"])), 
-                                   self.project.data["values"],
-                                   c=colors,
-                                   s=300, alpha=0.8, edgecolors='white', linewidth=2)
-                ax.set_xticks(range(len(self.project.data["labels"])))
-                ax.set_xticklabels(self.project.data["labels"])
-                ax.set_ylabel('Values', color='#CCCCCC', fontsize=12)
-                ax.grid(True, alpha=0.2, color='#666666')
-            
-            ax.set_title(self.project.title, color='#FFFFFF', fontsize=18, weight='bold', pad=20)
+            self.draw_figure()
+            if key is not None:
+                self.frame_cache.put(key, self.canvas.copy_from_bbox(self.figure.bbox))
+        except Exception as e:
+            print(f"Error updating chart: {e}")
+            traceback.print_exc()
+            # Start from a clean figure next time
+            self.renderer = None
+    
+    def frame_key(self):
+        """Key of the chart in the frame cache, None if a zoomed view is shown"""
+        aggregation = AGGREGATION_OPTIONS[self.aggregation_menu.get()]
+        if self.renderer is not None and self.renderer.chart_type == self.project.chart_type:
+            # The renderer keeps its zoom for the next render
+            if self.renderer.view() is not None:
+                return None
+        return (self.project.content_hash(), aggregation, self.canvas.get_width_height(physical=True))
+    
+    def draw_figure(self):
+        """Renders the project into the figure and draws the canvas"""
+        self.render_figure()
+        self.canvas.draw()
+    
+    def render_figure(self):
+        """Renders the project into the figure, the canvas is drawn by the caller"""
+        # Only a different chart type needs new artists
+        if self.renderer is None or self.renderer.chart_type != self.project.chart_type:
+            self.renderer = diadrop.create_renderer(self.figure, self.project.chart_type)
+        # The aggregated table is cached by the renderer until the data or the mode changes
+        self.renderer.aggregation = AGGREGATION_OPTIONS[self.aggregation_menu.get()]
+        
+        self.renderer.render(self.project)
+        self.title_artist = self.renderer.title_artist
+        self.title_background = None
+        self.figure_stale = False
+    
+    def ensure_figure(self):
+        """Draws the figure if the canvas only shows a cached frame of it"""
+        if self.figure_stale:
+            self.draw_figure()
+    
+    def on_canvas_resize(self, event):
+        # A resized canvas invalidates the cached title background and the drawn detail
+        self.title_background = None
+        if self.chart_pending:
+            return
+        if self.figure_stale:
+            # The canvas draws the figure after resizing, it has to show the current chart
+            self.render_figure()
+        elif self.renderer is not None:
+            self.renderer.update_detail()
+        if self.renderer is not None:
+            # The frame of that draw is cached for the new size
+            self.frame_pending = self.frame_key()
+    
+    def on_canvas_draw(self, event):
+        if self.chart_pending:
+            # The canvas drew the empty figure at its real size, the chart follows from the
+            # frame cache or is drawn and cached
+            self.chart_pending = False
+            self.after_idle(self.update_chart)
+            return
+        key, self.frame_pending = self.frame_pending, None
+        # A chart without data has no title artist, the title is hidden while its background is captured
+        if key is None or self.title_artist is None or not self.title_artist.get_visible():
+            return
+        if key == self.frame_key():
+            self.frame_cache.put(key, self.canvas.copy_from_bbox(self.figure.bbox))
+    
+    def zoom_chart(self, event):
+        """Zooms line and scatter charts around the mouse with the mouse wheel"""
+        if self.figure_stale:
+            # The event refers to the axes of the figure, not of the shown frame
+            self.draw_figure()
+            return
+        if self.renderer is None or event.inaxes is not self.renderer.ax:
+            return
+        factor = 0.8 if event.button == 'up' else 1.25
+        if self.renderer.zoom(event.xdata, factor):
+            self.title_background = None
+            self.canvas.draw_idle()
+    
+    def update_chart_title(self):
+        """Redraws only the title by blitting it onto the cached chart background"""
+        title = self.chart_title_entry.get() or "My Chart"
+        if title == self.project.title:
+            return
+        if self.title_artist is None or self.figure_stale:
+            self.update_chart()
+            return
+        
+        try:
+            self.apply_edit({"op": "settings", "chart_type": self.project.chart_type, "title": title})
+            self.title_artist.set_text(title)
             
-            if chart_type != "Pie":
-                ax.set_xlabel('Categories', color='#CCCCCC', fontsize=12)
+            if self.title_background is None:
+                # Capture the chart once without its title
+                self.title_artist.set_visible(False)
+                self.canvas.draw()
+                self.title_background = self.canvas.copy_from_bbox(self.figure.bbox)
+                self.title_artist.set_visible(True)
             
-            plt.tight_layout()
-            self.canvas.draw()
+            self.canvas.restore_region(self.title_background)
+            self.figure.draw_artist(self.title_artist)
+            self.canvas.blit(self.figure.bbox)
         except Exception as e:
             print(f"Error updating chart: {e}")
-            traceback.print_exc()
+            self.update_chart()
+    
+    def on_tab_changed(self):
+        if self.sidebar.get() == "Dia Code" and self.dia_code_stale:
+            self.update_dia_code_display()
     
     def update_dia_code_display(self):
         dia_content = self.project.to_dia_format()
         self.dia_code_text.delete("1.0", "end")
         self.dia_code_text.insert("1.0", dia_content)
+        self.dia_code_stale = False
     
     def apply_dia_code(self):
         try:
             code_text = self.dia_code_text.get("1.0", "end-1c")
             
-            # Temporary project to test code
-            temp_project = DiagramProject()
-            if temp_project.from_dia_format(code_text):
-                # Code is valid, update main project
-                self.project.from_dia_format(code_text)
-                
-                # Update UI
-                self.chart_type.set(self.project.chart_type)
-                self.color_scheme.set(self.project.color_scheme)
-                self.chart_title_entry.delete(0, 'end')
-                self.chart_title_entry.insert(0, self.project.title)
-                
-                self.update_data_display()
-                self.update_chart()
-                self.save_project()
-                
-                messagebox.showinfo("Success", ".dia code successfully applied!")
-            else:
-                messagebox.showerror("Error", "Invalid .dia code!")
+            # The project is only changed if the whole code is valid
+            self.project.from_dia_format(code_text)
+            
+            # Update UI
+            self.chart_type.set(self.project.chart_type)
+            self.color_scheme.set(self.project.color_scheme)
+            self.chart_title_entry.delete(0, 'end')
+            self.chart_title_entry.insert(0, self.project.title)
+            
+            self.update_data_display()
+            self.request_render()
+            self.mark_dirty()
+            
+            messagebox.showinfo("Success", ".dia code successfully applied!")
             
+        except DiaParseError as e:
+            # Jump to the faulty position
+            self.dia_code_text.mark_set("insert", f"{e.line}.{e.column - 1}")
+            self.dia_code_text.see("insert")
+            messagebox.showerror("Error", f"Invalid .dia code!\n{e}")
         except Exception as e:
             messagebox.showerror("Error", f"Error applying code: {str(e)}")
     
-    def save_project(self):
+    def apply_edit(self, edit):
+        self.project.apply_edit(edit)
+        self.mark_dirty(edit)
+    
+    def mark_dirty(self, edit=None):
+        self.project.mark_dirty(edit)
+        self.dia_code_stale = True
+        self.save_scheduler.schedule()
+    
+    def save_project(self, full=False):
+        self.save_scheduler.cancel()
         try:
-            self.start_menu.save_project(self.project)
-            return True
+            return self.start_menu.save_project(self.project, full)
         except Exception as e:
             print(f"Error saving project: {e}")
             messagebox.showerror("Error", f"Project could not be saved: {str(e)}")
             return False
     
     def save_chart(self):
-        """Saves the chart as an image (PNG, JPG, JPEG, PDF, SVG)"""
-        if not self.project.data["labels"]:
+        """Exports the chart to the selected formats (PNG, JPG, SVG, PDF) in the background"""
+        if not self.project.data:
             messagebox.showwarning("No Data", "Please enter data first!")
             return
         
+        formats = [file_format for file_format, var in self.export_formats.items() if var.get()]
+        if not formats:
+            messagebox.showwarning("Export", "Please select at least one format!")
+            return
+        try:
+            dpis = sorted({int(text) for text in self.export_dpi_entry.get().replace(";", ",").split(",")
+                           if text.strip()})
+            if not dpis or not all(50 <= dpi <= 1200 for dpi in dpis):
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Error", "Please enter resolutions between 50 and 1200 dpi!")
+            return
+        
         file_path = filedialog.asksaveasfilename(
-            defaultextension=".png",
-            filetypes=[
-                ("PNG Files", "*.png"), 
-                ("JPEG Files", "*.jpg"),
-                ("JPEG Files", "*.jpeg"),
-                ("PDF Files", "*.pdf"),
-                ("SVG Files", "*.svg"),
-                ("All Files", "*.*")
-            ],
+            defaultextension=f".{formats[0]}",
+            initialfile=self.project.name,
+            filetypes=[(f"{file_format.upper()} Files", f"*.{file_format}") for file_format in formats]
+                      + [("All Files", "*.*")],
             title="Save Chart as Image"
         )
         
         if file_path:
-            try:
-                self.figure.savefig(file_path, dpi=300, facecolor='#2B2B2B', 
-                                  edgecolor='none', bbox_inches='tight')
-                messagebox.showinfo("Success", f"Chart saved at:\n{file_path}")
-            except Exception as e:
-                messagebox.showerror("Error", f"Chart could not be saved: {str(e)}")
+            base_path, extension = os.path.splitext(file_path)
+            if extension.lower().lstrip(".") not in diadrop.EXPORT_FORMATS + ("jpeg",):
+                base_path = file_path
+            self.ensure_figure()
+            # Long series are drawn thinned out, the image may contain every point instead
+            full_resolution = self.renderer is not None and self.renderer.decimated and messagebox.askyesno(
+                "Full Resolution",
+                f"The chart shows a reduced number of its {len(self.project.data)} points.\n\n"
+                "Save every point? This can take a while for large tables."
+            )
+            export = diadrop.ChartExport(
+                self.project.snapshot(),
+                diadrop.export_targets(base_path, formats, dpis),
+                full_resolution,
+                AGGREGATION_OPTIONS[self.aggregation_menu.get()],
+                self.renderer.view() if self.renderer is not None else None
+            )
+            self.start_export(export)
+    
+    def start_export(self, export):
+        """Runs the export in worker processes and shows its progress, the editor stays usable"""
+        count = len(export.targets)
+        self.export_button.configure(state="disabled")
+        self.export_label.configure(text=f"Exporting {count} image{'s' if count > 1 else ''}...")
+        self.export_status.pack(fill="x", padx=10, pady=5)
+        # A single image only reports progress once it is done
+        if count == 1:
+            self.export_progress.configure(mode="indeterminate")
+            self.export_progress.start()
+        else:
+            self.export_progress.configure(mode="determinate")
+            self.export_progress.set(0)
+        self.export_job = BackgroundJob(self, export.run, self.export_progress.set, self.on_chart_exported)
+    
+    def cancel_export(self):
+        if self.export_job is not None:
+            self.export_job.cancel()
+            self.export_label.configure(text="Cancelling...")
+    
+    def on_chart_exported(self, export, error):
+        self.export_job = None
+        self.export_progress.stop()
+        self.export_status.pack_forget()
+        self.export_button.configure(state="normal")
+        if isinstance(error, diadrop.JobCancelled):
+            return
+        if error is not None:
+            messagebox.showerror("Error", f"Chart could not be saved: {str(error)}")
+            return
+        
+        lines = [f"Saved: {file_path}" for file_path in export.written]
+        lines += [f"Failed: {file_path} ({error})" for file_path, error in export.failed]
+        if export.failed:
+            messagebox.showerror("Error", "Chart could not be saved completely:\n\n" + "\n".join(lines))
+        else:
+            messagebox.showinfo("Success", "Chart saved at:\n" + "\n".join(export.written))
     
     def toggle_fullscreen(self, event=None):
         self.is_fullscreen = not self.is_fullscreen
@@ -1154,6 +1900,10 @@ class DiagramCreator(ctk.CTk):
         return "break"
     
     def on_closing(self):
+        # A running export stops, images already written stay
+        if self.export_job is not None:
+            self.export_job.cancel()
+        
         # Stop auto-save timer
         if self.auto_save_id:
             try:
@@ -1161,8 +1911,9 @@ class DiagramCreator(ctk.CTk):
             except:
                 pass  # Ignore errors when stopping timer
         
-        # Perform final save
-        self.save_project()
+        # Perform final save, folding any journaled edits into the project file
+        if self.project.is_dirty or self.project.journal_size:
+            self.save_project(full=True)
         
         # Return to start menu
         self.destroy()